@@ -13,241 +13,25 @@ Authors: M'Poy Julien & Perez Joaquim
 Date: 15.01.2017
 Location: Haute École Arc, Neuchâtel
 """
-from math import ceil
-from itertools import chain
+from math import ceil, inf, isclose
+from operator import itemgetter
+import multiprocessing
+import os
+import queue
 import time
-import copy
 import random
-import pygame
-import sys
-from operator import attrgetter
-from functools import total_ordering
-from pygame.locals import (
-    KEYDOWN, QUIT, MOUSEBUTTONDOWN, K_RETURN, K_ESCAPE,
-    K_SPACE
-)
 
+from checkpoint import Checkpoint
+from instance import Instance
+from eax import eax_crossover
+from local_search import EPSILON, two_opt
+from offspring import OffspringPool
+from profiler import Profiler
+from renderer import display
+from result_cache import ResultCache
+from telemetry import Telemetry
+from solution import Solution, evaluate, order_crossover
 
-"""
-City class
-"""
-
-
-class City:
-    """Class representing a city."""
-
-    def __init__(self, name, position):
-        """Name is city's name and position is a two floats tuple."""
-        self.name = name
-        self.position = position
-
-        # will contain the next city and the distance to it
-        # when creating a solution
-        self.next = None
-        self.dist = None
-
-    def __eq__(self, other):
-        try:
-            return self.name == other.name and self.position == other.position
-        except AttributeError:
-            return False
-
-    def __repr__(self):
-        return "{} {}\n".format(self.name, self.position)
-
-    def __hash__(self):
-        return hash(self.name)
-
-    def get_closest(self, cities):
-        closest = cities[0]
-        closest_dist = self.distance_to(closest)
-        for city in cities:
-            if self.distance_to(city) < closest_dist:
-                closest = city
-        return closest
-
-    def distance_to(self, other):
-        dx, dy = (
-            self.position[0] - other.position[0],
-            self.position[1] - other.position[1]
-        )
-        return (dx*dx + dy*dy) ** .5
-
-"""
-Solution
-"""
-
-
-@total_ordering
-class Solution:
-    def __init__(self, cities):
-        """
-        cities is an ordered list of cities, the last one is linked to the
-        first one
-        """
-        self.cities = copy.copy(cities)
-        self.compute_fitness()
-
-    def compute_fitness(self):
-        self.fitness = 0
-        self.dict = {}
-
-        old_city = self.cities[0]
-        for city in chain(self.cities + [old_city]):
-            distance = old_city.distance_to(city)
-            # add the distance between this city and
-            # the previous one to the fitness
-            self.fitness += distance
-            old_city.next = city
-            old_city.dist = distance
-            self.dict[old_city.name] = old_city
-            old_city = city
-
-    # total_ordering makes solutions comparable from these 2 methods
-    def __eq__(self, other):
-        return self.fitness == other.fitness
-
-    def __lt__(self, other):
-        return self.fitness < other.fitness
-
-    def __repr__(self):
-        return "solution with fitness {}".format(self.fitness)
-
-    def mutate(self):
-        """
-        two blocks inversion (not indispensable)
-        ABCDEF becomes CDEFAB
-
-        The solution keeps the same, it only gives more chances to the FA
-        segment to be muted.
-        """
-        pivot = random.randrange(len(self.cities))
-        self.cities = self.cities[pivot:] + self.cities[:pivot]
-
-        # i <- minimum born, j <- maximum born
-        i = random.randrange(len(self.cities)-1)
-        j = random.randrange(i+1, len(self.cities))
-
-        # C
-        # D
-        # E <-- i
-        # F
-        # A <-- j
-        # B
-
-        top = self.cities[:i]  # CD
-        middle = self.cities[i:j]  # EF
-        bottom = self.cities[j:]  # AB
-        # tidying block
-        self.cities = middle + top + bottom  # EFCDAB
-
-        self.compute_fitness()
-
-    @staticmethod
-    def create_pseudo_best(cities):
-        # petite copie oklm pour ne pas toucher aux objets originaux
-        cities = list(cities)
-        ordered_cities = []
-        city = cities[0]
-        ordered_cities.append(city)
-        cities.remove(city)
-        while cities:
-            city = city.get_closest(cities)
-            ordered_cities.append(city)
-            cities.remove(city)
-        return Solution(ordered_cities)
-
-"""
-GUI
-"""
-
-
-class Gui:
-    """Gui screen using pygame."""
-    def __init__(self, cities=None, file_name=''):
-        self.screen_x = 500
-        self.screen_y = 500
-        self.city_color = [10, 10, 200]  # blue
-        self.city_radius = 3
-        self.font_color = [255, 255, 255]  # white
-        pygame.init()
-        self.window = pygame.display.set_mode((self.screen_x, self.screen_y))
-        pygame.display.set_caption('Travelling Salesman Problem')
-        self.screen = pygame.display.get_surface()
-        self.font = pygame.font.Font(None, 30)
-
-        if cities:
-            self.cities = cities
-            self.draw_cities()
-            self.text(file_name)
-            pygame.display.flip()
-            self.wait_for_user_input()
-        else:
-            self.cities = []
-            self.place_cities()
-
-    def wait_for_user_input(self):
-        while True:
-            event = pygame.event.wait()
-            if (event.type == QUIT or (
-                    event.type == KEYDOWN and event.key == K_ESCAPE
-            )):
-                sys.exit(0)
-            elif (event.type == KEYDOWN and (
-                    event.key == K_RETURN or event.key == K_SPACE
-                )
-            ):
-                break
-
-    def place_cities(self):
-        city_counter = 0
-        self.screen.fill(0)
-        self.text("Placez vos point puis appuyez sur Enter")
-        pygame.display.flip()
-        while True:
-            for event in pygame.event.get():
-                if event.type == MOUSEBUTTONDOWN:
-                    pos = pygame.mouse.get_pos()
-                    name = "v{}".format(city_counter)
-                    self.cities.append(City(name, pos))
-                    city_counter += + 1
-                    self.screen.fill(0)
-                    self.draw_cities()
-                    self.text("Nombre: {}".format(len(self.cities)))
-                    pygame.display.flip()
-                elif (event.type == QUIT or (
-                        event.type == KEYDOWN and event.key == K_ESCAPE
-                    )
-                ):
-                    sys.exit(0)
-                elif (event.type == KEYDOWN and (
-                    event.key == K_RETURN or event.key == K_SPACE
-                    )
-                ):
-                    if(len(self.cities) > 2):
-                        return
-
-    def draw_cities(self):
-        for city in self.cities:
-            pygame.draw.circle(
-                self.screen, self.city_color, city.position, self.city_radius
-            )
-
-    def draw_path(self, solution, msg="", color=[255, 0, 0]):
-        self.screen.fill(0)
-        pygame.draw.lines(self.screen, color, True, [
-            city.position for city in solution.cities]
-        )
-        self.draw_cities()
-        self.text(msg)
-        pygame.display.flip()
-
-    def text(self, msg, render=False):
-        text = self.font.render(msg, True, self.font_color)
-        textRect = text.get_rect()
-        self.screen.blit(text, textRect)
-        if render:
-            pygame.display.flip()
 
 """
 Algorithme
@@ -260,39 +44,10 @@ def crossover_from_best_in_parents(father, mother):
     nex city and choose the closest one. If this city is already present
     in the solution, we take the other parent's one. If this city is
     already in the solution too, we choose an other city randomly.
+
+    The children are not evaluated yet, see solution.evaluate.
     """
-    children = []
-    for i in range(2):
-        cities = []
-        names = [city.name for city in father.cities]
-        chosen_name = random.choice(names)
-        while len(names) > 0:
-            names.remove(chosen_name)
-            current_city = father.dict[chosen_name]
-            cities.append(current_city)
-            from_father = father.dict[chosen_name]
-            from_mother = mother.dict[chosen_name]
-
-            candidates = []
-            if from_father.next.name in names:
-                candidates += [from_father]
-            if from_mother.next.name in names:
-                candidates += [from_mother]
-
-            if len(candidates) > 0:
-                # we can use a gene from one the parents
-                candidates.sort(key=attrgetter('dist'))
-                chosen_name = candidates[0].next.name
-            else:
-                """
-                we cannot because both cities are already in the solution
-                we are building.
-                """
-                if names:
-                    chosen_name = random.choice(names)
-        children += [Solution(cities)]
-
-    return children
+    return father.crossing(mother)
 
 
 def ox_crossover(x, y, crossover_ratio=0.3):
@@ -301,153 +56,587 @@ def ox_crossover(x, y, crossover_ratio=0.3):
     randomly following the crossover_ration parameter.
 
     The two children are generated and returned as a tuple containing.
+    They are not evaluated yet, see solution.evaluate.
     """
-    x, y = x.cities, y.cities
-    genes_to_crossover = int(ceil(len(x) * crossover_ratio))
-    start = random.randint(0, len(x) - genes_to_crossover - 1)
+    instance = x.instance
+    genes_to_crossover = int(ceil(len(x.order) * crossover_ratio))
+    start = random.randint(0, len(x.order) - genes_to_crossover - 1)
     stop = start + genes_to_crossover
-    x_crossover = tuple(x[start:stop])
-    y_crossover = tuple(y[start:stop])
-    prepared_x = [item if item not in y_crossover else None for item in x]
-    x_shifts = prepared_x[stop:].count(None)
-    prepared_y = [item if item not in x_crossover else None for item in y]
-    y_shifts = prepared_y[stop:].count(None)
-    new_x = [item for item in prepared_x if item is not None]
-    new_y = [item for item in prepared_y if item is not None]
-    new_x = shift_list(new_x, x_shifts)
-    new_y = shift_list(new_y, y_shifts)
-    new_x = new_x[:start] + list(y_crossover) + new_x[start:]
-    new_y = new_y[:start] + list(x_crossover) + new_y[start:]
-    return Solution(new_x), Solution(new_y)
-
-
-def shift_list(items, shifts):
-    """Left shift a list of elements."""
-    for i in range(shifts):
-        items = items[1:] + items[:1]
-    return items
-
-
-def ga_solve(file=None, gui=True, maxtime=0, maxstagnation=200):
-    """
-    Main function parsing file, initializing UI and launching genetic
-    algorithm solving method.
-    """
-
-    # dictionnary containing the cities
-    # key: city's name, value: City object
-    cities = []
-
-    # just because we are already using a gui variable
-    gui_diplay = gui
+    new_x, new_y = order_crossover(x.order, y.order, start, stop)
+    return (
+        Solution(instance, new_x, evaluate=False),
+        Solution(instance, new_y, evaluate=False)
+    )
 
-    if file:
-        with open(file, encoding='utf-8') as positions_file:
-            for line in positions_file:
-                # for each line, we create a City object with the coordinates
-                cityname, x, y = line.split()
-                cities.append(City(cityname, (int(x), int(y))))
-            if gui_diplay:
-                gui = Gui(cities, file)
-    else:
-        gui = Gui()
-        cities = gui.cities
 
-    t1 = time.time()
+POPULATION_SIZE = 20
+# mutation rate
+MUTATION_RATE = 0.2
+# seconds between two checks that the islands are still alive
+ISLAND_POLL = 1
 
-    POPULATION_SIZE = 20
-    # int because division always returns a float
-    HALF = int(POPULATION_SIZE/2)
-    QUARTER = int(POPULATION_SIZE/4)
-    # mutation rate
-    rate = 0.2
 
+def initial_population(instance, size=POPULATION_SIZE, seeds=()):
     """
-    RANGS contains n*0,  (n-1)*1 ... 1*n
-        -> example 10, 9,9, 8,8,8, 7,7,7,7, ...
+    Random solutions plus the nearest neighbour one. The orders given by
+    seeds, tours found by earlier runs for example, take the place of
+    random solutions.
     """
-    RANGS = [
-        POPULATION_SIZE-i for i in range(POPULATION_SIZE+1) for j in range(i)
+    indices = list(range(len(instance)))
+    population = [
+        Solution(instance, order, evaluate=False) for order in seeds[:size]
     ]
+    for i in range(size - len(population)):
+        random.shuffle(indices)
+        population.append(Solution(instance, indices, evaluate=False))
+    evaluate(population)
 
-    population = []
-    for i in range(POPULATION_SIZE):
-        random.shuffle(cities)
-        population.append(Solution(cities))
-
-    pseudo_best = Solution.create_pseudo_best(cities)
+    pseudo_best = Solution.create_pseudo_best(instance)
     population.append(pseudo_best)
+    return population
+
 
-    old_best = 0
+def evolve(population, method_1=True, local_search=True, deadline=None,
+           size=POPULATION_SIZE, pool=None,
+           crossover=crossover_from_best_in_parents, profiler=None):
+    """
+    Run one generation of the genetic algorithm on a population of the
+    given size. The children are bred by the offspring.OffspringPool pool
+    when there is one. crossover alternates with ox_crossover. The phases
+    are timed by the profiler.Profiler profiler when there is one.
+
+    Returns the next population, a copy of the best solution of the given
+    one and the crossover method to start with at the next generation.
+    """
+    # int because division always returns a float
+    HALF = int(size/2)
+    QUARTER = int(size/4)
+
+    # population sorting
+    population.sort()
+    if profiler:
+        profiler.lap('sort')
+
+    if local_search:
+        # memetic step: the elites are brought to a local optimum
+        for solution in population[:QUARTER]:
+            if not solution.local_optimum:
+                two_opt(solution, deadline=deadline)
+        population.sort()
+        if profiler:
+            profiler.lap('local search')
+
+    best = population[0].copy()
+
+    # population = population[:HALF] # selects half of the best solutions
+
+    # more natural selection
+    # select a quarter of the best solutions
+    population = population[:QUARTER]
+    # the select an other quarter randomly
+    # population[QUARTER:] remains
+    population += random.sample(population, QUARTER)
+
+    # seems more correct but works gives worse results
+    # elite, reste = population[:QUARTER], population[QUARTER:]
+    # population = elite + random.sample(population, QUARTER)
+
+    # population shuffling
+    random.shuffle(population)
+    if profiler:
+        profiler.lap('selection')
+
+    # crossover
+    pairs = []
+    for i in range(0, HALF, 2):  # 0 to HALF 2-by-2
+        sol1 = population[i]
+        sol2 = population[i+1]
+        if method_1:
+            pairs.append((crossover, sol1, sol2))
+        else:
+            pairs.append((ox_crossover, sol1, sol2))
+        method_1 = not method_1
+
+    if pool:
+        # the workers mutate the children themselves, at the same rate
+        parents = population
+        children = pool.breed(pairs, MUTATION_RATE)
+        population = population + children
+        if profiler:
+            profiler.lap('breed')
+    else:
+        children = []
+        for crossover, sol1, sol2 in pairs:
+            children += list(crossover(sol1, sol2))
+            if profiler:
+                profiler.lap(crossover.__name__)
+        # evaluate all the children at once and add them to the population
+        evaluate(children)
+        parents = population = population + children
+        if profiler:
+            profiler.lap('evaluate')
+
+    # muate 20% of the solutions
+    mutants = random.sample(parents, int(MUTATION_RATE * len(parents)))
+    [solution.mutate() for solution in mutants]
+    population.append(best)
+    if profiler:
+        profiler.lap('mutate')
+        # mutations update the fitness by a delta, still an evaluation
+        profiler.count('evaluations', len(children) + len(mutants))
+
+    return population, best, method_1
+
+
+def generations(population, deadline=None, maxstagnation=200,
+                local_search=True, size=POPULATION_SIZE, pool=None,
+                crossover=crossover_from_best_in_parents, profiler=None,
+                checkpoint=None, resume=None):
+    """
+    Evolve the population until time.time() reaches deadline or, without
+    deadline, until the best solution did not get shorter by more than
+    local_search.EPSILON for maxstagnation generations, the fitness updated
+    by mutations drifting by rounding errors. size, pool, crossover and
+    profiler are passed on to evolve.
+
+    Yields (generation, population, best, improved) after every
+    generation, the population may be added solutions meanwhile. Closing
+    the generator stops the algorithm.
+
+    checkpoint, a checkpoint.Checkpoint, saves the state of the algorithm
+    at the end of a generation now and then. resume is a state it loaded,
+    to go on from.
+    """
+    old_best = inf
     stagnation = 0
+    generation = 0
 
     method_1 = True
 
+    if resume:
+        generation = resume['generation']
+        stagnation = resume['stagnation']
+        old_best = resume['old_best']
+        method_1 = resume['method_1']
+
     # genetic algorithm
     while True:
-        # population sorting
-        population.sort()
+        population, best, method_1 = evolve(
+            population, method_1, local_search, deadline, size, pool,
+            crossover, profiler
+        )
+        generation += 1
 
-        best = Solution(population[0].cities)
-
-        # population = population[:HALF] # selects half of the best solutions
-
-        # more natural selection
-        # select a quarter of the best solutions
-        population = population[:QUARTER]
-        # the select an other quarter randomly
-        # population[QUARTER:] remains
-        population += random.sample(population, QUARTER)
-
-        # seems more correct but works gives worse results
-        # elite, reste = population[:QUARTER], population[QUARTER:]
-        # population = elite + random.sample(population, QUARTER)
-
-        # population shuffling
-        random.shuffle(population)
-
-        # crossover
-        for i in range(0, HALF, 2):  # 0 to HALF 2-by-2
-            sol1 = population[i]
-            sol2 = population[i+1]
-            # add children to the population
-            if method_1:
-                population += crossover_from_best_in_parents(sol1, sol2)
-            else:
-                population += list(ox_crossover(sol1, sol2))
-            method_1 = not method_1
-
-        # muate 20% of the solutions
-        [
-            solution.mutate() for solution in random.sample(
-                population, int(rate * len(population))
-            )
-        ]
-        population.append(best)
+        improved = best.fitness < old_best - EPSILON
+        if profiler:
+            profiler.count('generations')
+        yield generation, population, best, improved
+        if profiler:
+            profiler.lap('step')
 
-        if best.fitness == old_best:
+        if not improved:
             stagnation += 1
             # stop if the best solution is the same n time consequently
-            if not maxtime and stagnation == maxstagnation:
-                break
+            if deadline is None and stagnation == maxstagnation:
+                return
         else:
             stagnation = 0
-            if gui_diplay:
-                gui.draw_path(best, msg=str(best.fitness))
+            old_best = best.fitness
+
+        if deadline is not None and time.time() > deadline:
+            return
+
+        if checkpoint and checkpoint.due():
+            checkpoint.save(
+                population, generation, stagnation, old_best, method_1
+            )
+            if profiler:
+                profiler.lap('checkpoint')
+
+
+def genetic_algorithm(population, deadline=None, maxstagnation=200,
+                      local_search=True, step=None, size=POPULATION_SIZE,
+                      pool=None, crossover=crossover_from_best_in_parents,
+                      profiler=None, checkpoint=None, resume=None):
+    """
+    Run generations to their end and improve the best solution by a last
+    local search. The other parameters are the ones of generations.
+
+    step(generation, population, best, improved) is called after every
+    generation, it may add solutions to the population and stops the
+    algorithm by returning True.
+
+    Returns the best solution found.
+    """
+    evolution = generations(
+        population, deadline, maxstagnation, local_search, size, pool,
+        crossover, profiler, checkpoint, resume
+    )
+    try:
+        for generation, population, best, improved in evolution:
+            if step and step(generation, population, best, improved):
+                break
+    finally:
+        evolution.close()
+
+    if local_search:
+        two_opt(best, deadline=deadline)
+        if profiler:
+            profiler.lap('final local search')
+    return best
+
+
+def ga_iter(instance, maxtime=0, maxstagnation=200, local_search=True,
+            islands=1, migration=20, topology='ring',
+            population_size=POPULATION_SIZE, workers=0, eax=True, seed=None,
+            step=None, profile=None, telemetry=None, result_cache=None,
+            good_enough=None, checkpoint=None, resume=False):
+    """
+    Solve the instance, yielding (fitness, path, elapsed) every time a
+    better tour is found: its length, the names of its cities in visiting
+    order and the seconds since the start. The last one yielded is the
+    best tour found.
+
+    The generator can be closed at any moment, its processes, threads and
+    streams are released and the best tour found so far is kept by the
+    result cache. The checkpoint is only removed by a run that reached its
+    end, a closed run can be resumed.
+
+    An island run only yields its best tour, once all islands stopped.
+    The parameters are the ones of ga_solve.
+    """
+    # without a seed, the random state left by the caller is used
+    if seed is not None:
+        random.seed(seed)
+
+    t1 = time.time()
+    saved = None
+    if checkpoint:
+        if isinstance(checkpoint, str):
+            checkpoint = Checkpoint(checkpoint)
+        if resume and os.path.exists(checkpoint.file):
+            saved = checkpoint.load(instance)
+        else:
+            checkpoint.started = t1
+        t1 = checkpoint.started
+    deadline = t1 + maxtime if maxtime else None
+
+    crossover = eax_crossover if eax else crossover_from_best_in_parents
+
+    seeds = []
+    if result_cache:
+        if result_cache is True:
+            result_cache = ResultCache()
+        seeds = list(result_cache.load(instance))
+        if seeds and good_enough is not None:
+            cached = Solution(instance, seeds[0])
+            # the cached tour starts from another city, its length is summed
+            # in another order and may differ in the last digits
+            if cached.fitness <= good_enough or isclose(
+                cached.fitness, good_enough
+            ):
+                yield (
+                    cached.fitness, instance.path(cached.order),
+                    time.time() - t1
+                )
+                return
+
+    def found(best):
+        """What is yielded for the best solution."""
+        # mutations update the fitness by deltas, sum it again from scratch
+        return (
+            float(instance.tour_lengths(best.order)),
+            instance.path(best.order),
+            time.time() - t1
+        )
 
-        if maxtime:
-            dt = time.time() - t1
-            if dt > maxtime:
+    if islands > 1:
+        best = solve_islands(
+            instance, islands, deadline, maxstagnation, local_search,
+            migration, topology, population_size, crossover, seeds
+        )
+        if result_cache:
+            result_cache.store(instance, [best])
+        yield found(best)
+        return
+
+    profiler = Profiler() if profile is True else profile or None
+    stream = telemetry
+    if isinstance(stream, str):
+        stream = Telemetry(stream)
+    if stream:
+        stream.begin()
+
+    pool = OffspringPool(instance, workers) if workers else None
+    if profiler:
+        profiler.start()
+    # copy of the best solution yielded, the population keeps changing it,
+    # and its length summed from scratch
+    best_found = None
+    shortest = inf
+    evolution = None
+    try:
+        if saved:
+            population = saved['population']
+        else:
+            population = initial_population(instance, population_size, seeds)
+        if profiler:
+            profiler.lap('initial population')
+        evolution = generations(
+            population, deadline, maxstagnation, local_search,
+            population_size, pool, crossover, profiler, checkpoint, saved
+        )
+        for generation, population, best, improved in evolution:
+            if stream:
+                stream.record(generation, population, best, improved)
+            stop = step and step(generation, population, best, improved)
+            # a resumed run yields the best solution it starts from
+            if improved or best_found is None:
+                tour = found(best)
+                if tour[0] < shortest:
+                    best_found, shortest = best.copy(), tour[0]
+                    yield tour
+            if stop:
                 break
 
-        old_best = best.fitness
+        if local_search:
+            two_opt(best_found, deadline=deadline)
+            if profiler:
+                profiler.lap('final local search')
+            tour = found(best_found)
+            if tour[0] < shortest:
+                shortest = tour[0]
+                yield tour
+        if checkpoint:
+            checkpoint.remove()
+        if stream:
+            # the final record agrees with the length returned
+            best_found.compute_fitness()
+            stream.finish(best_found)
+    finally:
+        if evolution:
+            evolution.close()
+        if checkpoint:
+            # a killed run leaves its last save complete
+            checkpoint.wait()
+        if profiler:
+            profiler.stop()
+        if pool:
+            pool.close()
+        if stream is not telemetry:
+            stream.close()
+        if result_cache and best_found:
+            result_cache.store(instance, [best_found])
+    if profile is True:
+        profiler.report()
+
+
+def ga_solve(file=None, gui=True, maxtime=0, maxstagnation=200,
+             local_search=True, islands=1, migration=20, topology='ring',
+             population_size=POPULATION_SIZE, workers=0, eax=True,
+             cache=True, seed=None, step=None, profile=None,
+             telemetry=None, instance=None, result_cache=None,
+             good_enough=None, checkpoint=None, resume=False):
+    """
+    Main function parsing file, initializing UI and launching genetic
+    algorithm solving method. An already loaded Instance can be given
+    instead of file. The tours ga_iter finds are drawn as they come and
+    the last one is returned as (fitness, path).
+
+    With local_search, the elites of every generation and the final best
+    solution are improved by 2-opt and Or-opt moves.
+
+    With islands > 1, that many processes each evolve their own population
+    and send their best solution to another island every migration
+    generations, either the next one (topology='ring') or a random one
+    (topology='random').
+
+    With eax, the edge assembly crossover takes turns with ox_crossover
+    instead of crossover_from_best_in_parents.
+
+    With workers > 0, a single population is evolved but the crossovers
+    and mutations of each generation are spread over that many processes
+    sharing the instance through shared memory.
+
+    Both cannot run in a daemonic process, such as a multiprocessing.Pool
+    worker.
+
+    With cache, the cities read from file, their distance matrix and
+    neighbour lists are kept in a binary sidecar next to it and reused by
+    the next runs on the same file.
+
+    A given seed makes the run repeatable, workers included, as long as
+    maxtime does not stop it. Islands also depend on when the migrants
+    arrive. Without a seed, the random module goes on from the state the
+    caller left it in.
+
+    step(generation, population, best, improved) is called after every
+    generation of a single population and may stop it, as by
+    genetic_algorithm.
+
+    profile times the phases of a single population, it is either a
+    profiler.Profiler, whose summary() can be read after the run, or True
+    to print the summary at the end.
+
+    result_cache keeps the best tours of every instance solved, it is
+    either a result_cache.ResultCache or True for the default one. The
+    cached tours seed the initial population, or are returned at once
+    when one is not longer than good_enough.
+
+    checkpoint saves the state of a single population to a file every
+    checkpoint.CHECKPOINT_INTERVAL seconds, it is either the file name or
+    a checkpoint.Checkpoint. With resume, a run goes on from the state
+    found in it, with the time it already ran counted. The file is removed
+    once the run is over.
+
+    telemetry streams JSON lines about the convergence of a single
+    population, it is either a telemetry.Telemetry or the target of one,
+    a file name or a socket address, receiving a record on every
+    improvement.
+    """
+    # just because we are already using a gui variable
+    gui_diplay = gui
+
+    if gui_diplay or not (file or instance):
+        # pygame is only loaded when there is something to display
+        from gui import Gui
 
+    if instance is None and file:
+        # cities and the matrix of the distances between them
+        instance = Instance.from_file(file, cache)
+    if instance is None:
+        gui = Gui()
+        instance = Instance(gui.cities)
+    elif gui_diplay:
+        gui = Gui(instance.cities, file or '')
+
+    tours = ga_iter(
+        instance, maxtime, maxstagnation, local_search, islands, migration,
+        topology, population_size, workers, eax, seed, step, profile,
+        telemetry, result_cache, good_enough, checkpoint, resume
+    )
     if gui_diplay:
-        gui.draw_path(best, msg=str(best.fitness), color=[0, 255, 0])
+        # solved on another thread, this one draws the tours as they come
+        fitness, path, elapsed = display(gui, tours)
+    else:
+        for fitness, path, elapsed in tours:
+            pass
+
+    if gui_diplay:
+        gui.draw_path(path, msg=str(fitness), color=[0, 255, 0])
         gui.wait_for_user_input()
 
-    path = [city.name for city in best.cities]
-    return best.fitness, path
+    return fitness, path
+
+
+"""
+Islands
+"""
+
+
+def solve_islands(instance, islands, deadline=None, maxstagnation=200,
+                  local_search=True, migration=20, topology='ring',
+                  size=POPULATION_SIZE,
+                  crossover=crossover_from_best_in_parents, seeds=()):
+    """
+    Run the genetic algorithm on several islands, each one in its own
+    process, and return the best solution found by any of them. Every
+    island's initial population gets the seeds orders.
+
+    An island whose process dies without a result is left out, a
+    RuntimeError is raised when they all do.
+    """
+    inboxes = [multiprocessing.Queue() for i in range(islands)]
+    results = multiprocessing.Queue()
+    # Euclidean distances are cheaper to compute again than to send
+    dist = instance.dist if instance.metric is not None else None
+    workers = [
+        multiprocessing.Process(target=run_island, args=(
+            instance.names, instance.coords, dist, instance.metric, island,
+            random.getrandbits(32), inboxes, results, deadline,
+            maxstagnation, local_search, migration, topology, size, crossover,
+            seeds
+        ))
+        for island in range(islands)
+    ]
+    for worker in workers:
+        worker.start()
+
+    found = {}
+    try:
+        while len(found) < islands:
+            try:
+                island, fitness, order = results.get(timeout=ISLAND_POLL)
+                found[island] = fitness, order
+                continue
+            except queue.Empty:
+                pass
+            waiting = [
+                island for island, worker in enumerate(workers)
+                if island not in found
+            ]
+            if any(workers[island].is_alive() for island in waiting):
+                continue
+            # a result put just before exiting may still be on its way
+            while True:
+                try:
+                    island, fitness, order = results.get(timeout=ISLAND_POLL)
+                except queue.Empty:
+                    break
+                found[island] = fitness, order
+            break
+    finally:
+        for worker in workers:
+            worker.join()
+
+    if not found:
+        raise RuntimeError(
+            "every island died, exit codes {}".format(
+                [worker.exitcode for worker in workers]
+            )
+        )
+    fitness, order = min(found.values(), key=itemgetter(0))
+    return Solution(instance, order, fitness)
+
+
+def run_island(names, coords, dist, metric, island, seed, inboxes, results,
+               deadline, maxstagnation, local_search, migration, topology,
+               size, crossover, seeds=()):
+    """
+    Evolve one island's population, sending its best solution to another
+    island every migration generations and welcoming the ones it receives.
+    Put (island, fitness, order) of the best solution found in results.
+    """
+    # forked processes would all share the parent's random state
+    random.seed(seed)
+    instance = Instance.from_arrays(names, coords, dist, metric=metric)
+    inbox = inboxes[island]
+    others = [other for other in range(len(inboxes)) if other != island]
+    for other in others:
+        # do not wait at exit for migrants nobody is reading anymore
+        inboxes[other].cancel_join_thread()
+
+    def step(generation, population, best, improved):
+        if generation % migration:
+            return
+        if topology == 'ring':
+            target = (island + 1) % len(inboxes)
+        else:
+            target = random.choice(others)
+        inboxes[target].put((best.fitness, best.order))
+
+        while True:
+            try:
+                fitness, order = inbox.get_nowait()
+            except queue.Empty:
+                break
+            population.append(Solution(instance, order, fitness))
+
+    best = genetic_algorithm(
+        initial_population(instance, size, seeds), deadline, maxstagnation,
+        local_search, step, size, crossover=crossover
+    )
+    results.put((island, best.fitness, best.order))
 
 """
 MAIN
@@ -469,13 +658,108 @@ if __name__ == "__main__":
         help="specify the number of iteration with \
             stagnation before stopping the algorithm"
     )
+    parser.add_argument(
+        "-l", "--nolocalsearch",
+        help="disable the 2-opt local search", action="store_true"
+    )
+    parser.add_argument(
+        "-i", "--islands", type=int, default=1,
+        help="specify the number of processes evolving their own population"
+    )
+    parser.add_argument(
+        "-m", "--migration", type=int, default=20,
+        help="specify the number of generations between two migrations"
+    )
+    parser.add_argument(
+        "-e", "--noeax",
+        help="use the greedy crossover instead of the edge assembly one",
+        action="store_true"
+    )
+    parser.add_argument(
+        "-p", "--population", type=int, default=POPULATION_SIZE,
+        help="specify the population size"
+    )
+    parser.add_argument(
+        "-w", "--workers", type=int, default=0,
+        help="specify the number of processes breeding the children"
+    )
+    parser.add_argument(
+        "--topology", choices=('ring', 'random'), default='ring',
+        help="specify where the islands send their best solution"
+    )
+    parser.add_argument(
+        "--profile",
+        help="print the time spent in every phase of the algorithm",
+        action="store_true"
+    )
+    parser.add_argument(
+        "--cprofile", metavar="FILE",
+        help="also save the statistics of a cProfile session to FILE"
+    )
+    parser.add_argument(
+        "--telemetry", metavar="TARGET",
+        help="stream JSON lines about the convergence to a file, - for the "
+             "standard output, tcp://host:port or unix:///path"
+    )
+    parser.add_argument(
+        "--every", choices=('improvement', 'generation'),
+        default='improvement', help="specify when telemetry is written"
+    )
+    parser.add_argument(
+        "-r", "--reuse",
+        help="seed the population with the tours cached by earlier runs "
+             "and cache the one found", action="store_true"
+    )
+    parser.add_argument(
+        "--goodenough", type=float, metavar="LENGTH",
+        help="with --reuse, return a cached tour at once if not longer"
+    )
+    parser.add_argument(
+        "-c", "--checkpoint", metavar="FILE",
+        help="save the state of the run to FILE now and then"
+    )
+    parser.add_argument(
+        "--resume",
+        help="go on from the state saved in the checkpoint file",
+        action="store_true"
+    )
+    parser.add_argument(
+        "--nocache",
+        help="do not read nor write the binary cache of the cities file",
+        action="store_true"
+    )
     args = parser.parse_args()
 
+    profiler = None
+    if args.profile or args.cprofile:
+        profiler = Profiler(args.cprofile)
+    telemetry = None
+    if args.telemetry:
+        telemetry = Telemetry(args.telemetry, args.every)
+
     distance, path = ga_solve(
         file=args.filename,
         gui=not args.nogui,
         maxtime=args.maxtime,
-        maxstagnation=args.maxstagnation
+        maxstagnation=args.maxstagnation,
+        local_search=not args.nolocalsearch,
+        islands=args.islands,
+        migration=args.migration,
+        topology=args.topology,
+        population_size=args.population,
+        workers=args.workers,
+        cache=not args.nocache,
+        profile=profiler,
+        telemetry=telemetry,
+        result_cache=args.reuse,
+        good_enough=args.goodenough,
+        checkpoint=args.checkpoint,
+        resume=args.resume,
+        eax=not args.noeax
     )
 
+    if profiler:
+        profiler.report()
+    if telemetry:
+        telemetry.close()
     print("Distance : {}\nPath : {}".format(distance, path))
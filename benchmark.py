@@ -0,0 +1,295 @@
+"""
+Statistics over repeated runs of ga_solve.
+
+Every configuration, a set of ga_solve keyword arguments, is run with the
+same seeds, in parallel. The lengths found, the generations per second and
+the time taken to reach a target length are summarised per configuration,
+and every configuration is compared to the first one with Mann-Whitney U
+tests, so a real change can be told from noise.
+
+    python benchmark.py -f data/pb100.txt -t 10 -r 10 -o results \\
+        -c greedy '{"eax": false}' -c eax '{}'
+"""
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import statistics
+import time
+from math import erfc, sqrt
+
+import tsplib
+from MPoyPerez import ga_solve
+from instance import Instance
+
+# largest pair of samples whose U distribution is counted exactly
+EXACT_SIZE = 40
+
+# columns of the CSV summary
+COLUMNS = (
+    'configuration', 'runs', 'mean', 'median', 'stdev', 'best', 'worst',
+    'generations_per_second', 'target', 'reached', 'time_to_target',
+)
+
+
+def run_once(task):
+    """
+    One ga_solve run without GUI. Returns its record: the length found, the
+    time taken, the number of generations and every improvement of the best
+    length as an (elapsed, length) pair.
+    """
+    name, options, file, maxtime, seed = task
+    improvements = []
+    generations = 0
+    start = time.time()
+
+    def step(generation, population, best, improved):
+        nonlocal generations
+        generations = generation
+        if improved:
+            improvements.append((time.time() - start, best.fitness))
+
+    length, path = ga_solve(
+        file, False, maxtime, seed=seed, step=step, **options
+    )
+    elapsed = time.time() - start
+    # the final polish may still improve the best solution
+    improvements.append((elapsed, length))
+    return {
+        'configuration': name, 'seed': seed, 'length': length,
+        'time': elapsed, 'generations': generations,
+        'improvements': improvements,
+    }
+
+
+def run_all(configurations, file, maxtime, seeds, processes):
+    """
+    Records of every configuration, given as (name, options) pairs, run
+    with every seed. processes = 0 runs them one after another in this
+    process, needed by the configurations using islands or workers.
+    """
+    tasks = [
+        (name, options, file, maxtime, seed)
+        for name, options in configurations for seed in seeds
+    ]
+    if not processes:
+        return [run_once(task) for task in tasks]
+    with multiprocessing.Pool(processes) as pool:
+        return pool.map(run_once, tasks, chunksize=1)
+
+
+def time_to_target(record, target):
+    """Time the run took to reach the target length, None if it did not."""
+    for elapsed, length in record['improvements']:
+        if length <= target + 1e-9:
+            return elapsed
+    return None
+
+
+def summarise(records, target):
+    """Statistics of the records of one configuration."""
+    lengths = [record['length'] for record in records]
+    reached = [
+        elapsed for elapsed in (
+            time_to_target(record, target) for record in records
+        ) if elapsed is not None
+    ]
+    return {
+        'runs': len(records),
+        'mean': statistics.mean(lengths),
+        'median': statistics.median(lengths),
+        'stdev': statistics.stdev(lengths) if len(lengths) > 1 else 0.,
+        'best': min(lengths),
+        'worst': max(lengths),
+        'generations_per_second': statistics.mean(
+            record['generations'] / record['time'] for record in records
+        ),
+        'target': target,
+        'reached': len(reached),
+        'time_to_target': statistics.median(reached) if reached else None,
+    }
+
+
+def mann_whitney(a, b):
+    """
+    U statistic of the sample a against b, the number of pairs where the
+    value of a is the largest, and the two-sided p-value of both samples
+    coming from the same distribution. Exact for small samples without
+    ties, from the normal approximation otherwise.
+    """
+    n1, n2 = len(a), len(b)
+    n = n1 + n2
+    values = sorted(a + b)
+    # average rank of every value, ranks starting at 1
+    ranks = {}
+    ties = 0
+    i = 0
+    while i < n:
+        j = i
+        while j < n and values[j] == values[i]:
+            j += 1
+        ranks[values[i]] = (i + j + 1) / 2
+        ties += (j - i) ** 3 - (j - i)
+        i = j
+    u = sum(ranks[value] for value in a) - n1 * (n1 + 1) / 2
+
+    if not ties and n <= EXACT_SIZE:
+        counts = u_distribution(n1, n2)
+        tail = sum(counts[:int(min(u, n1 * n2 - u)) + 1])
+        return u, min(1., 2 * tail / sum(counts))
+
+    variance = n1 * n2 / 12 * ((n + 1) - ties / (n * (n - 1)))
+    if variance <= 0:
+        return u, 1.
+    # with continuity correction
+    z = max(abs(u - n1 * n2 / 2) - 0.5, 0) / sqrt(variance)
+    return u, min(1., erfc(z / sqrt(2)))
+
+
+def u_distribution(n1, n2):
+    """
+    Number of orderings of two samples of n1 and n2 distinct values giving
+    each value of U, by increasing U.
+    """
+    # counts[j] is the distribution for i values of a and j values of b
+    counts = [[1] for j in range(n2 + 1)]
+    for i in range(1, n1 + 1):
+        row = [[1]]
+        for j in range(1, n2 + 1):
+            # the largest value is either from a, above the j values of b,
+            # or from b
+            from_a = [0] * j + counts[j]
+            from_b = row[j - 1] + [0] * (len(from_a) - len(row[j - 1]))
+            row.append([x + y for x, y in zip(from_a, from_b)])
+        counts = row
+    return counts[n2]
+
+
+def compare(records, baseline, other):
+    """Tests of the configuration other against baseline."""
+    comparison = {'configuration': other, 'baseline': baseline}
+    for key, value in (
+        ('length', lambda record: record['length']),
+        ('generations_per_second',
+         lambda record: record['generations'] / record['time']),
+    ):
+        a = [value(record) for record in records[other]]
+        b = [value(record) for record in records[baseline]]
+        u, p = mann_whitney(a, b)
+        comparison[key] = {
+            'difference': statistics.mean(a) - statistics.mean(b),
+            'u': u, 'p_value': p,
+        }
+    return comparison
+
+
+def benchmark(configurations, file, maxtime=0, runs=10, seed=0,
+              processes=None, target=None):
+    """
+    Run every configuration runs times, with the seeds seed, seed + 1, ...
+    and return a report of the runs, a summary per configuration and the
+    comparisons of the other configurations to the first one.
+
+    Without target, the time to target is the time taken to reach the
+    optimum of a TSPLIB problem when it is known, otherwise the best
+    length found by any run.
+    """
+    seeds = list(range(seed, seed + runs))
+    started = time.time()
+    done = run_all(configurations, file, maxtime, seeds, processes)
+
+    if target is None and file.endswith('.tsp'):
+        target = tsplib.optimum(file, Instance.from_file(file))
+    if target is None:
+        target = min(record['length'] for record in done)
+
+    records = {name: [] for name, options in configurations}
+    for record in done:
+        records[record['configuration']].append(record)
+    names = [name for name, options in configurations]
+    return {
+        'file': file, 'maxtime': maxtime, 'seeds': seeds, 'target': target,
+        'duration': time.time() - started,
+        'configurations': dict(configurations),
+        'summaries': {
+            name: summarise(records[name], target) for name in names
+        },
+        'comparisons': [compare(records, names[0], name) for name in names[1:]],
+        'runs': done,
+    }
+
+
+def write_csv(report, file):
+    """One line of statistics per configuration."""
+    with open(file, 'w', newline='') as csv_file:
+        out = csv.writer(csv_file, delimiter=';')
+        out.writerow(COLUMNS)
+        for name, summary in report['summaries'].items():
+            out.writerow([name] + [summary[column] for column in COLUMNS[1:]])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="statistics over repeated runs of ga_solve"
+    )
+    parser.add_argument("-f", "--filename", required=True,
+                        help="use the file given as input")
+    parser.add_argument("-t", "--maxtime", type=int, default=0,
+                        help="specify the maximum time in seconds of a run")
+    parser.add_argument("-r", "--runs", type=int, default=10,
+                        help="specify the number of runs per configuration")
+    parser.add_argument("-s", "--seed", type=int, default=0,
+                        help="specify the seed of the first run")
+    parser.add_argument(
+        "-p", "--processes", type=int, default=os.cpu_count(),
+        help="specify the number of runs at once, 0 to run them here"
+    )
+    parser.add_argument("--target", type=float,
+                        help="specify the length of the time to target")
+    parser.add_argument(
+        "-c", "--config", nargs=2, action='append',
+        metavar=('NAME', 'OPTIONS'),
+        help="add a configuration, OPTIONS being the ga_solve keyword "
+             "arguments as a JSON object; the first one is the baseline"
+    )
+    parser.add_argument("-o", "--output",
+                        help="write the report to OUTPUT.json and OUTPUT.csv")
+    args = parser.parse_args(argv)
+
+    configurations = [
+        (name, json.loads(options))
+        for name, options in (args.config or [('default', '{}')])
+    ]
+    report = benchmark(
+        configurations, args.filename, args.maxtime, args.runs, args.seed,
+        args.processes, args.target
+    )
+
+    print("target {:.1f}".format(report['target']))
+    for name, summary in report['summaries'].items():
+        print(
+            "{}: mean {mean:.1f} median {median:.1f} stdev {stdev:.1f} "
+            "best {best:.1f} worst {worst:.1f} "
+            "{generations_per_second:.1f} generations/s, target reached "
+            "{reached}/{runs}".format(name, **summary),
+            "" if summary['time_to_target'] is None else
+            "in {:.2f}s".format(summary['time_to_target'])
+        )
+    for comparison in report['comparisons']:
+        print("{configuration} vs {baseline}:".format(**comparison), ", ".join(
+            "{} {:+.2f} (p = {:.3f})".format(
+                key, comparison[key]['difference'], comparison[key]['p_value']
+            )
+            for key in ('length', 'generations_per_second')
+        ))
+
+    if args.output:
+        with open(args.output + '.json', 'w') as json_file:
+            json.dump(report, json_file, indent=2)
+        write_csv(report, args.output + '.csv')
+    return report
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,141 @@
+"""
+Checkpoints of the genetic algorithm, to resume a run that was stopped.
+
+A checkpoint holds the population as an array of orders with their
+fitness, the generation and stagnation counters and the state of the
+random generator, so a resumed run goes on exactly as it would have.
+"""
+import json
+import os
+import random
+import threading
+import time
+
+import numpy as np
+
+from result_cache import ordered_key
+from solution import Solution
+
+# seconds between two checkpoints
+CHECKPOINT_INTERVAL = 30
+
+
+class Checkpoint:
+    """
+    Saves of a run to file, at most every interval seconds. Every save
+    replaces the previous one atomically, a run killed while saving still
+    has its previous checkpoint. The state is copied on the solver's thread
+    but written to disk on another one, so the generations go on meanwhile.
+    """
+
+    def __init__(self, file, interval=CHECKPOINT_INTERVAL):
+        self.file = file
+        self.interval = interval
+        # start of the run, the elapsed time is saved
+        self.started = time.time()
+        self.saved = time.time()
+        # thread writing the last save, and what it raised
+        self.writer = None
+        self.error = None
+
+    def due(self):
+        return time.time() - self.saved >= self.interval
+
+    def save(self, population, generation, stagnation, old_best, method_1):
+        """
+        State of genetic_algorithm at the end of a generation, the best
+        solution being the last one of the population.
+        """
+        instance = population[0].instance
+        # the selection puts some solutions twice in the population, they
+        # must stay a single object
+        solutions = {}
+        members = [
+            solutions.setdefault(id(solution), (len(solutions), solution))[0]
+            for solution in population
+        ]
+        solutions = [solution for index, solution in solutions.values()]
+        version, internal, gauss_next = random.getstate()
+        state = {
+            'instance': ordered_key(instance),
+            'generation': generation,
+            'stagnation': stagnation,
+            'old_best': old_best,
+            'method_1': method_1,
+            'elapsed': time.time() - self.started,
+            'random': [version, gauss_next],
+        }
+        arrays = {
+            'orders': np.stack([solution.order for solution in solutions]),
+            'fitness': np.array([s.fitness for s in solutions]),
+            'local_optimum': np.array([s.local_optimum for s in solutions]),
+            'members': np.array(members, dtype=np.int32),
+            'random': np.array(internal, dtype=np.uint64),
+            'state': np.array(json.dumps(state)),
+        }
+        # a single save is written at a time, the latest one
+        self.wait()
+        self.writer = threading.Thread(target=self.write, args=(arrays,))
+        self.writer.start()
+        self.saved = time.time()
+
+    def write(self, arrays):
+        """Write the arrays of a save, on the writer thread."""
+        temporary = '{}.{}.tmp'.format(self.file, os.getpid())
+        try:
+            with open(temporary, 'wb') as checkpoint_file:
+                np.savez(checkpoint_file, **arrays)
+                # on disk before it replaces the previous checkpoint
+                checkpoint_file.flush()
+                os.fsync(checkpoint_file.fileno())
+            os.replace(temporary, self.file)
+        except Exception as e:
+            self.error = e
+
+    def wait(self):
+        """Wait for the last save to be written, raising what it raised."""
+        if self.writer:
+            self.writer.join()
+            self.writer = None
+        if self.error:
+            error, self.error = self.error, None
+            raise error
+
+    def load(self, instance):
+        """
+        Population and state saved for the instance, as a dict with the
+        keys of save. Restores the random generator and the start of the
+        run, moved back by the time it already ran.
+        """
+        with np.load(self.file) as saved:
+            state = json.loads(str(saved['state']))
+            if state['instance'] != ordered_key(instance):
+                raise ValueError(
+                    "{} is the checkpoint of another instance".format(
+                        self.file
+                    )
+                )
+            solutions = []
+            for order, fitness, local_optimum in zip(
+                saved['orders'], saved['fitness'].tolist(),
+                saved['local_optimum'].tolist()
+            ):
+                solution = Solution(instance, order, fitness)
+                solution.local_optimum = local_optimum
+                solutions.append(solution)
+            population = [solutions[i] for i in saved['members'].tolist()]
+            version, gauss_next = state['random']
+            random.setstate(
+                (version, tuple(saved['random'].tolist()), gauss_next)
+            )
+        state['population'] = population
+        self.started = time.time() - state['elapsed']
+        return state
+
+    def remove(self):
+        """The run is over, there is nothing left to resume."""
+        self.wait()
+        try:
+            os.remove(self.file)
+        except OSError:
+            pass
@@ -6,10 +6,10 @@ class City:
         self.name = name
         self.position = position
 
-        # will contain the next city and the distance to it
-        # when creating a solution
-        self.next = None
-        self.dist = None
+        # index of the city in its instance's distance matrix and the
+        # matching row, set by Instance
+        self.index = None
+        self.distances = None
 
     def __eq__(self, other):
         try:
@@ -27,10 +27,13 @@ class City:
         closest = cities[0]
         closest_dist = self.distance_to(closest)
         for city in cities:
-            if self.distance_to(city) < closest_dist:
-                closest = city
+            distance = self.distance_to(city)
+            if distance < closest_dist:
+                closest, closest_dist = city, distance
         return closest
 
     def distance_to(self, other):
+        if self.distances is not None:
+            return self.distances[other.index]
         dx, dy = self.position[0] - other.position[0], self.position[1] - other.position[1]
         return (dx*dx + dy*dy) ** .5
@@ -0,0 +1,24 @@
+"""Fixtures shared by the unit tests."""
+import random
+
+import pytest
+
+from city import City
+from instance import Instance
+
+
+@pytest.fixture
+def random_instance():
+    """
+    Factory of instances with size cities at random integer positions,
+    drawn from the random module so the tests seeding it get the same ones.
+    """
+    def make(size=12):
+        return Instance([
+            City(
+                "v{}".format(i),
+                (random.randint(0, 500), random.randint(0, 500))
+            )
+            for i in range(size)
+        ])
+    return make
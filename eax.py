@@ -0,0 +1,196 @@
+"""
+Edge Assembly Crossover (EAX).
+
+The edges of both parents are joined into AB-cycles, cycles alternating
+between an edge of the father and an edge of the mother. A child starts
+from one parent's edges and swaps the ones of an AB-cycle for the other
+parent's, which usually splits the tour into subtours. These are merged
+back greedily, looking for the cheapest way to join them among the
+candidate neighbour lists.
+"""
+import random
+
+from solution import Solution
+
+# number of AB-cycles tried for each child, the shortest child is kept
+TRIES = 5
+
+
+def eax_crossover(father, mother):
+    """
+    Two children, one built from the father's edges and one from the
+    mother's. They are not evaluated yet, see solution.evaluate.
+    """
+    instance = father.instance
+    father_adj = adjacency(father.order.tolist())
+    mother_adj = adjacency(mother.order.tolist())
+    cycles = ab_cycles(father_adj, mother_adj)
+    return [
+        Solution(
+            instance, build_child(instance, father_adj, cycles, 0),
+            evaluate=False
+        ),
+        Solution(
+            instance, build_child(instance, mother_adj, cycles, 1),
+            evaluate=False
+        )
+    ]
+
+
+def adjacency(order):
+    """The two cities next to every city of the tour."""
+    adj = [None] * len(order)
+    previous = order[-1]
+    for index, city in enumerate(order):
+        adj[city] = [previous, order[(index + 1) % len(order)]]
+        previous = city
+    return adj
+
+
+def ab_cycles(a_adj, b_adj):
+    """
+    Split the edges found in only one of the tours into AB-cycles. Every
+    cycle is a list of cities whose even edges, from cycle[j] to
+    cycle[j+1] with j even, belong to the first tour and odd edges, the
+    last one going back to cycle[0], to the second one.
+    """
+    n = len(a_adj)
+    # edges of each tour the other one does not have
+    a_left = [[c for c in a_adj[v] if c not in b_adj[v]] for v in range(n)]
+    b_left = [[c for c in b_adj[v] if c not in a_adj[v]] for v in range(n)]
+
+    cycles = []
+    for start in range(n):
+        while a_left[start]:
+            # walk alternating edges until the path crosses itself with a
+            # different edge type, then cut the cycle it made
+            path = [start]
+            positions = {start: [0]}
+            while len(path) > 1 or a_left[start]:
+                city = path[-1]
+                # the edge leaving path[j] belongs to the first tour when j
+                # is even
+                left = a_left if len(path) % 2 else b_left
+                following = random.choice(left[city])
+                left[city].remove(following)
+                left[following].remove(city)
+                path.append(following)
+
+                # an earlier visit of the city leaving it by an edge of the
+                # other type than the one just taken closes a cycle
+                parity = (len(path) - 1) % 2
+                for i in reversed(positions.get(following, ())):
+                    if i % 2 == parity:
+                        break
+                else:
+                    positions.setdefault(following, []).append(len(path) - 1)
+                    continue
+
+                cycle = path[i:-1]
+                if i % 2:
+                    # make it start with an edge of the first tour
+                    cycle = cycle[1:] + cycle[:1]
+                cycles.append(cycle)
+                for city in path[i+1:-1]:
+                    positions[city].pop()
+                del path[i+1:]
+    return cycles
+
+
+def build_child(instance, base_adj, cycles, offset):
+    """
+    Child made of the base tour's edges, the ones of an AB-cycle being
+    swapped for the other tour's. offset is 0 when the base tour is the
+    first one of the AB-cycles, 1 otherwise. Tries up to TRIES random
+    cycles and returns the shortest child as a list of city indices.
+    """
+    rows = instance.rows
+    best, best_delta = base_adj, None
+    for cycle in random.sample(cycles, min(TRIES, len(cycles))):
+        adj = [list(pair) for pair in base_adj]
+        delta = 0.
+        size = len(cycle)
+        for j in range(offset, size, 2):
+            u, v = cycle[j], cycle[(j + 1) % size]
+            adj[u].remove(v)
+            adj[v].remove(u)
+            delta -= rows[u][v]
+        for j in range(1 - offset, size, 2):
+            u, v = cycle[j], cycle[(j + 1) % size]
+            adj[u].append(v)
+            adj[v].append(u)
+            delta += rows[u][v]
+        delta += merge_subtours(instance, adj)
+        if best_delta is None or delta < best_delta:
+            best, best_delta = adj, delta
+    return tour(best)
+
+
+def merge_subtours(instance, adj):
+    """
+    Join the subtours described by adj into a single tour, in place,
+    always joining the smallest subtour to another one at the lowest cost.
+    Returns the length added.
+    """
+    rows = instance.rows
+    neighbours = instance.neighbour_rows
+    n = len(adj)
+
+    # subtour of every city and cities of every subtour
+    label = [-1] * n
+    subtours = {}
+    for start in range(n):
+        if label[start] < 0:
+            subtours[start] = cities = tour(adj, start)
+            for city in cities:
+                label[city] = start
+
+    delta = 0.
+    while len(subtours) > 1:
+        current = min(subtours, key=lambda key: len(subtours[key]))
+        cities = subtours[current]
+        best = None
+        for candidates in (neighbours, None):
+            for u in cities:
+                for v in (candidates[u] if candidates else range(n)):
+                    if label[v] == current:
+                        continue
+                    for u2 in adj[u]:
+                        for v2 in adj[v]:
+                            # u-u2 and v-v2 become u-v and u2-v2
+                            cost = (
+                                rows[u][v] + rows[u2][v2]
+                                - rows[u][u2] - rows[v][v2]
+                            )
+                            if best is None or cost < best[0]:
+                                best = (cost, u, u2, v, v2)
+            if best:
+                break
+
+        cost, u, u2, v, v2 = best
+        adj[u].remove(u2)
+        adj[u2].remove(u)
+        adj[v].remove(v2)
+        adj[v2].remove(v)
+        adj[u].append(v)
+        adj[v].append(u)
+        adj[u2].append(v2)
+        adj[v2].append(u2)
+        delta += cost
+
+        target = label[v]
+        for city in cities:
+            label[city] = target
+        subtours[target] += subtours.pop(current)
+    return delta
+
+
+def tour(adj, start=0):
+    """Cities of the cycle of adj going through start, in order."""
+    cities = [start]
+    previous, city = start, adj[start][1]
+    while city != start:
+        cities.append(city)
+        first, second = adj[city]
+        previous, city = city, (second if first == previous else first)
+    return cities
@@ -1,6 +1,14 @@
-import pygame
-from pygame.locals import KEYDOWN, QUIT, MOUSEBUTTONDOWN, K_RETURN, K_ESCAPE
+"""
+Graphic user interface, the only module using pygame.
+"""
 import sys
+
+import pygame
+from pygame.locals import (
+    KEYDOWN, QUIT, MOUSEBUTTONDOWN, K_RETURN, K_ESCAPE,
+    K_SPACE
+)
+
 from city import City
 
 
@@ -25,17 +33,30 @@ class Gui:
             pygame.display.flip()
             self.wait_for_user_input()
         else:
-            self.cities = {}
+            self.cities = []
             self.place_cities()
 
     def wait_for_user_input(self):
         while True:
             event = pygame.event.wait()
-            if (event.type == QUIT or (event.type == KEYDOWN and event.key == K_ESCAPE)):
+            if (event.type == QUIT or (
+                    event.type == KEYDOWN and event.key == K_ESCAPE
+            )):
                 sys.exit(0)
-            elif event.type == KEYDOWN and (event.key == K_RETURN or event.key == 32): # 32 = spacebar
+            elif (event.type == KEYDOWN and (
+                    event.key == K_RETURN or event.key == K_SPACE
+                )
+            ):
                 break
 
+    def handle_events(self):
+        """Handle the pending events without waiting, quitting if asked."""
+        for event in pygame.event.get():
+            if (event.type == QUIT or (
+                    event.type == KEYDOWN and event.key == K_ESCAPE
+            )):
+                sys.exit(0)
+
     def place_cities(self):
         city_counter = 0
         self.screen.fill(0)
@@ -46,27 +67,37 @@ class Gui:
                 if event.type == MOUSEBUTTONDOWN:
                     pos = pygame.mouse.get_pos()
                     name = "v{}".format(city_counter)
-                    self.cities[name] = City(name, pos)
-                    city_counter = city_counter + 1
+                    self.cities.append(City(name, pos))
+                    city_counter += + 1
                     self.screen.fill(0)
                     self.draw_cities()
                     self.text("Nombre: {}".format(len(self.cities)))
                     pygame.display.flip()
-                elif (event.type == QUIT or (event.type == KEYDOWN and event.key == K_ESCAPE)):
+                elif (event.type == QUIT or (
+                        event.type == KEYDOWN and event.key == K_ESCAPE
+                    )
+                ):
                     sys.exit(0)
-                elif event.type == KEYDOWN:
-                    return
+                elif (event.type == KEYDOWN and (
+                    event.key == K_RETURN or event.key == K_SPACE
+                    )
+                ):
+                    if(len(self.cities) > 2):
+                        return
 
     def draw_cities(self):
-        for city in self.cities.values():
+        for city in self.cities:
             pygame.draw.circle(
                 self.screen, self.city_color, city.position, self.city_radius
             )
 
-
-    def draw_path(self, solution, msg="" , color=[255,0,0]):
+    def draw_path(self, path, msg="", color=[255, 0, 0]):
+        """Draw the tour visiting the cities named by path in order."""
+        positions = {city.name: city.position for city in self.cities}
         self.screen.fill(0)
-        pygame.draw.lines(self.screen, color, True, [city.position for city in solution.cities])
+        pygame.draw.lines(
+            self.screen, color, True, [positions[name] for name in path]
+        )
         self.draw_cities()
         self.text(msg)
         pygame.display.flip()
@@ -75,4 +106,5 @@ class Gui:
         text = self.font.render(msg, True, self.font_color)
         textRect = text.get_rect()
         self.screen.blit(text, textRect)
-        if render: pygame.display.flip()
+        if render:
+            pygame.display.flip()
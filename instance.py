@@ -0,0 +1,224 @@
+"""
+Problem instance: the cities of a TSP and their precomputed distances.
+"""
+import numpy as np
+
+from city import City
+from instance_cache import InstanceCache
+from loader import load_cities
+from spatial import nearest_neighbour_tour, neighbour_lists
+from tsplib import load_tsp
+
+# number of candidate neighbours kept for every city
+NEIGHBOURS = 10
+
+# largest instance whose distance matrix is written to the file cache, the
+# matrix of 5000 cities already takes 200 MB
+CACHED_MATRIX_CITIES = 5000
+
+
+class Instance:
+    """
+    Cities of a problem and the matrix of the distances between them. The
+    matrix is only computed when first used, so large instances can still
+    be loaded, measured and given a nearest neighbour tour.
+    """
+
+    def __init__(self, cities):
+        """
+        cities is a list of City objects. Each city gets its index in the
+        distance matrix and, once it is computed, the matching row of it, so
+        City.distance_to becomes a lookup.
+        """
+        cities = list(cities)
+        self.setup(
+            [city.name for city in cities],
+            np.array(
+                [city.position for city in cities], dtype=np.float64
+            ).reshape(-1, 2)
+        )
+        self.attach(cities)
+
+    @classmethod
+    def from_arrays(cls, names, coords, dist=None, neighbours=None,
+                    metric=None):
+        """
+        Instance from its names and (n, 2) coords array, with the distance
+        matrix and the neighbour lists when they are already known. City
+        objects are only created if cities is used.
+
+        metric is None when the distances are the Euclidean ones between the
+        coords, otherwise the TSPLIB edge weight type they follow, and dist
+        must be given.
+        """
+        instance = cls.__new__(cls)
+        instance.setup(names, coords, dist, neighbours, metric)
+        return instance
+
+    def setup(self, names, coords, dist=None, neighbours=None, metric=None):
+        self.names = names
+        self.coords = coords
+        self.metric = metric
+        self._dist = dist
+        self._rows = None
+        self._neighbours = neighbours
+        self._neighbour_rows = None
+        self._cities = None
+        # InstanceCache receiving the arrays once computed, if any
+        self.cache = None
+
+    def attach(self, cities):
+        """
+        Give the cities their index and, once the matrix exists, their
+        distances row.
+        """
+        rows = self._rows
+        for index, city in enumerate(cities):
+            city.index = index
+            city.distances = rows[index] if rows is not None else None
+        self._cities = cities
+
+    def __len__(self):
+        return len(self.coords)
+
+    @property
+    def dist(self):
+        """Matrix of the distances between the cities, computed once."""
+        if self._dist is None:
+            self._dist = distance_matrix(self.coords)
+            if self.cache is not None and len(self) <= CACHED_MATRIX_CITIES:
+                self.cache.save(dist=self._dist)
+        return self._dist
+
+    @property
+    def rows(self):
+        """
+        Same distances as plain lists, much faster than numpy for single
+        reads from Python loops.
+        """
+        if self._rows is None:
+            self._rows = self.dist.tolist()
+            if self._cities is not None:
+                self.attach(self._cities)
+        return self._rows
+
+    @property
+    def cities(self):
+        """City objects, in the order of the distance matrix."""
+        if self._cities is None:
+            self.attach([
+                City(name, tuple(position))
+                for name, position in zip(self.names, self.coords.tolist())
+            ])
+        return self._cities
+
+    @property
+    def neighbours(self):
+        """
+        (n, k) int32 array of the NEIGHBOURS closest cities of every city,
+        closest first, computed on first use. Moves joining a city to one of
+        them are the only ones worth trying on geometric instances.
+        """
+        if self._neighbours is None and self.metric is not None:
+            self._neighbours = matrix_neighbour_lists(self.dist, NEIGHBOURS)
+        elif self._neighbours is None:
+            self._neighbours = neighbour_lists(self.coords, NEIGHBOURS)
+            if self.cache is not None:
+                self.cache.save(neighbours=self._neighbours)
+        return self._neighbours
+
+    @property
+    def neighbour_rows(self):
+        """Same neighbour lists as plain lists, like rows."""
+        if self._neighbour_rows is None:
+            self._neighbour_rows = self.neighbours.tolist()
+        return self._neighbour_rows
+
+    def nearest_neighbour_tour(self, start=0):
+        """
+        Tour starting from the start city and always going to the closest
+        city not visited yet, as a list of indices.
+        """
+        if self.metric is not None:
+            return matrix_nearest_neighbour_tour(self.dist, start)
+        return nearest_neighbour_tour(self.coords, start)
+
+    def path(self, order):
+        """Names of the cities visited by order, as plain strings."""
+        return np.asarray(self.names)[order].tolist()
+
+    def tour_lengths(self, orders):
+        """
+        Length of the tour given by an array of city indices, or of every
+        tour given by the rows of a 2-D array of them.
+        """
+        # every edge, including the one going back to the start
+        following = np.roll(orders, -1, axis=-1)
+        if self._dist is not None:
+            return self.dist[orders, following].sum(axis=-1)
+        # without the matrix, from the coordinates, as distance_matrix does
+        delta = self.coords[orders] - self.coords[following]
+        return np.sqrt(np.einsum('...k,...k->...', delta, delta)).sum(axis=-1)
+
+    @classmethod
+    def from_file(cls, file, cache=True):
+        """
+        Read a file containing one "name x y" city per line. No City object
+        is created unless cities is used.
+
+        .tsp files are read as TSPLIB problems, see tsplib, and are not
+        cached.
+
+        With cache, the arrays are also kept in a binary sidecar next to the
+        file, see instance_cache, and later runs memory-map them instead of
+        parsing the file. The distance matrix and the neighbour lists join
+        the cache once computed.
+        """
+        if file.endswith('.tsp'):
+            names, coords, dist, metric = load_tsp(file)
+            return cls.from_arrays(names, coords, dist, metric=metric)
+        if not cache:
+            return cls.from_arrays(*load_cities(file))
+        store = InstanceCache(file)
+        arrays = store.load()
+        if arrays is None:
+            names, coords = load_cities(file)
+            store.save(names=names, coords=coords)
+            arrays = {'names': names, 'coords': coords}
+        instance = cls.from_arrays(
+            arrays['names'], arrays['coords'], arrays.get('dist'),
+            arrays.get('neighbours')
+        )
+        instance.cache = store
+        return instance
+
+
+def distance_matrix(coords):
+    """Euclidean distances between every pair of the (n, 2) coords array."""
+    delta = coords[:, np.newaxis, :] - coords[np.newaxis, :, :]
+    return np.sqrt(np.einsum('ijk,ijk->ij', delta, delta))
+
+
+def matrix_neighbour_lists(dist, k):
+    """
+    (n, k) int32 array holding the indices of the k closest cities of
+    every city according to the dist matrix, closest first.
+    """
+    # a city is not its own neighbour
+    others = dist + np.diag(np.full(len(dist), np.inf))
+    k = min(k, len(dist) - 1)
+    return np.argsort(others, axis=1)[:, :k].astype(np.int32)
+
+
+def matrix_nearest_neighbour_tour(dist, start=0):
+    """Nearest neighbour tour according to the dist matrix."""
+    remaining = np.ones(len(dist), dtype=bool)
+    city = start
+    order = [city]
+    remaining[city] = False
+    for i in range(len(dist) - 1):
+        candidates = np.flatnonzero(remaining)
+        city = int(candidates[dist[city, candidates].argmin()])
+        remaining[city] = False
+        order.append(city)
+    return order
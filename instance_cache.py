@@ -0,0 +1,97 @@
+"""
+Binary sidecar cache of the instances read from city files.
+
+The arrays of an instance are saved as .npy files in a directory next to
+the city file, along with a hash of the file's content. Later runs
+memory-map them instead of parsing the text and computing the distances
+and neighbour lists again.
+"""
+import hashlib
+import os
+
+import numpy as np
+
+# arrays an instance can cache
+ARRAYS = ('names', 'coords', 'dist', 'neighbours')
+
+# bytes hashed at once
+HASH_CHUNK_SIZE = 1 << 20
+
+
+def file_key(file):
+    """SHA-256 of the file's content."""
+    digest = hashlib.sha256()
+    with open(file, 'rb') as source:
+        for chunk in iter(lambda: source.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class InstanceCache:
+    """Sidecar directory of a city file, named after it with .cache."""
+
+    def __init__(self, file):
+        self.directory = file + '.cache'
+        self.key = file_key(file)
+
+    def path(self, name):
+        return os.path.join(self.directory, name + '.npy')
+
+    def load(self):
+        """
+        Memory-mapped arrays found in the cache by name, or None when there
+        is no cache for the current content of the file.
+        """
+        try:
+            with open(os.path.join(self.directory, 'key')) as key_file:
+                if key_file.read() != self.key:
+                    return None
+        except OSError:
+            return None
+
+        arrays = {}
+        for name in ARRAYS:
+            try:
+                arrays[name] = np.load(self.path(name), mmap_mode='r')
+            except (OSError, ValueError):
+                pass
+        if 'names' not in arrays or 'coords' not in arrays:
+            return None
+        return arrays
+
+    def save(self, **arrays):
+        """
+        Add arrays to the cache. A cache of another content of the file is
+        replaced. The cache is only an optimisation: failing to write it,
+        on a read-only directory for example, is silently ignored.
+        """
+        key_path = os.path.join(self.directory, 'key')
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            try:
+                with open(key_path) as key_file:
+                    current = key_file.read() == self.key
+            except OSError:
+                current = False
+            if not current:
+                # the key is written last, once the arrays are all there
+                for name in ARRAYS:
+                    if name not in arrays and os.path.exists(self.path(name)):
+                        os.remove(self.path(name))
+            for name, array in arrays.items():
+                write_atomically(self.path(name), array)
+            if not current:
+                temporary = key_path + '.{}.tmp'.format(os.getpid())
+                with open(temporary, 'w') as key_file:
+                    key_file.write(self.key)
+                os.replace(temporary, key_path)
+        except OSError:
+            pass
+
+
+def write_atomically(path, array):
+    """Save the array, readers never see a partly written file."""
+    temporary = '{}.{}.tmp'.format(path, os.getpid())
+    with open(temporary, 'wb') as array_file:
+        np.save(array_file, np.asarray(array))
+    os.replace(temporary, path)
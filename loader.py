@@ -0,0 +1,95 @@
+"""
+Bulk loader for the "name x y" city files.
+
+The file is memory-mapped and parsed chunk by chunk straight into NumPy
+arrays, so even files with millions of cities are read without creating
+an object per city.
+"""
+import mmap
+import os
+
+import numpy as np
+
+# bytes parsed at once, a chunk always ends at the end of a line
+CHUNK_SIZE = 1 << 22
+
+# bytes separating the fields, the ones bytes.split() splits on
+WHITESPACE = np.zeros(256, dtype=bool)
+WHITESPACE[list(b' \t\n\r\x0b\x0c')] = True
+
+
+def load_cities(file, chunk_size=CHUNK_SIZE):
+    """
+    Read a file containing one "name x y" city per line. Returns the names
+    as a NumPy array of strings and the coordinates as an (n, 2) float64
+    array.
+    """
+    names = []
+    coords = []
+    with open(file, 'rb') as cities_file:
+        size = os.fstat(cities_file.fileno()).st_size
+        if size:
+            with mmap.mmap(
+                cities_file.fileno(), 0, access=mmap.ACCESS_READ
+            ) as data:
+                start = 0
+                while start < size:
+                    stop = chunk_end(data, start, min(start + chunk_size, size))
+                    chunk_names, chunk_coords = parse_chunk(data[start:stop])
+                    names.append(chunk_names)
+                    coords.append(chunk_coords)
+                    start = stop
+
+    if not names:
+        return np.array([], dtype=str), np.empty((0, 2))
+    return np.concatenate(names), np.concatenate(coords)
+
+
+def chunk_end(data, start, stop):
+    """Position right after the last end of line between start and stop."""
+    if stop == len(data):
+        return stop
+    end = data.rfind(b'\n', start, stop)
+    if end < 0:
+        # a line longer than a chunk, take it whole
+        end = data.find(b'\n', stop)
+        if end < 0:
+            return len(data)
+    return end + 1
+
+
+def parse_chunk(chunk):
+    """Names and coordinates of the complete lines held by chunk."""
+    data = np.frombuffer(chunk, dtype=np.uint8)
+    # 1 inside a field, the fields start where it goes up and end where it
+    # goes down
+    inside = (~WHITESPACE[data]).view(np.int8)
+    edges = np.diff(inside, prepend=np.int8(0), append=np.int8(0))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    if len(starts) % 3:
+        raise ValueError(
+            "expected lines of 3 fields \"name x y\", got {} fields".format(
+                len(starts)
+            )
+        )
+    # like the text files read before, names are UTF-8
+    names = np.char.decode(fields(data, starts[0::3], ends[0::3]), 'utf-8')
+    coords = np.empty((len(names), 2))
+    coords[:, 0] = fields(data, starts[1::3], ends[1::3]).astype(np.float64)
+    coords[:, 1] = fields(data, starts[2::3], ends[2::3]).astype(np.float64)
+    return names, coords
+
+
+def fields(data, starts, ends):
+    """
+    Bytes of data between every start and end, as a fixed width bytes
+    array, built a column of bytes at a time.
+    """
+    lengths = ends - starts
+    width = int(lengths.max()) if len(lengths) else 1
+    matrix = np.zeros((len(starts), width), dtype=np.uint8)
+    for k in range(width):
+        longer = lengths > k
+        matrix[longer, k] = data[starts[longer] + k]
+    return matrix.view('S{}'.format(width)).ravel()
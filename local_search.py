@@ -0,0 +1,234 @@
+"""
+2-opt and Or-opt local search over the candidate neighbour lists.
+
+Only moves creating an edge between a city and one of its candidate
+neighbours are tried, and every city has a don't-look bit: a city is only
+looked at again when one of its edges changed since it was last looked at.
+"""
+import time
+from collections import deque
+
+import numpy as np
+
+# gains smaller than this are rounding errors, not improvements
+EPSILON = 1e-9
+
+# longest segment moved by Or-opt
+OR_OPT_LENGTH = 3
+
+
+def two_opt(solution, cities=None, deadline=None):
+    """
+    Improve the solution in place until no 2-opt or Or-opt move between
+    candidate neighbours shortens it, or until time.time() reaches deadline.
+
+    cities are the city indices to look at first, all of them by default.
+    Returns the total gain. The solution's local_optimum flag is set when
+    the search ran to the end, a last pass over every city finding no
+    move.
+    """
+    return LocalSearch(solution).run(cities, deadline)
+
+
+class LocalSearch:
+    """Tour as a list of city indices and the position of every city."""
+
+    def __init__(self, solution):
+        self.solution = solution
+        self.rows = solution.instance.rows
+        self.neighbours = solution.instance.neighbour_rows
+        self.order = solution.order.tolist()
+        self.pos = [0] * len(self.order)
+        for index, city in enumerate(self.order):
+            self.pos[city] = index
+
+    def succ(self, city):
+        return self.order[(self.pos[city] + 1) % len(self.order)]
+
+    def pred(self, city):
+        return self.order[self.pos[city] - 1]
+
+    def run(self, cities=None, deadline=None):
+        n = len(self.order)
+        if n < 5:
+            self.solution.local_optimum = True
+            return 0.
+        if cities is None:
+            cities = self.order
+        queue = deque(cities)
+        # don't-look bits, inverted: cities in the queue
+        queued = [False] * n
+        for city in queue:
+            queued[city] = True
+        # every city queued, with no move found since
+        full_pass = len(queue) == n
+        gain = 0.
+        while True:
+            while queue:
+                if deadline is not None and time.time() > deadline:
+                    break
+                city = queue.popleft()
+                queued[city] = False
+                move = self.improve_2opt(city) or self.improve_or_opt(city)
+                if move:
+                    move_gain, touched = move
+                    gain += move_gain
+                    full_pass = False
+                    for other in touched:
+                        if not queued[other]:
+                            queued[other] = True
+                            queue.append(other)
+            if queue or full_pass:
+                break
+            # a move can make one possible around a city left out of the
+            # queue, only a pass over all of them finding none proves the
+            # tour is a local optimum
+            queue.extend(range(n))
+            queued = [True] * n
+            full_pass = True
+
+        if gain > 0:
+            self.solution.order = np.array(self.order, dtype=np.int32)
+            # sum it again rather than accumulate rounding errors
+            self.solution.compute_fitness()
+        self.solution.local_optimum = not queue
+        return gain
+
+    def improve_2opt(self, a):
+        """
+        Look for a 2-opt move removing one of a's edges and joining a to a
+        candidate neighbour. Apply the first improving one and return its
+        gain and the cities whose edges changed.
+        """
+        rows = self.rows
+        for forward in (True, False):
+            step = self.succ if forward else self.pred
+            b = step(a)
+            d_ab = rows[a][b]
+            for c in self.neighbours[a]:
+                # neighbours are sorted, no later one can do better
+                g1 = d_ab - rows[a][c]
+                if g1 <= EPSILON:
+                    break
+                d = step(c)
+                if c == b or d == a:
+                    continue
+                gain = g1 + rows[c][d] - rows[b][d]
+                if gain > EPSILON:
+                    if forward:
+                        # a b ... c d becomes a c ... b d
+                        self.reverse(b, c)
+                    else:
+                        # d c ... b a becomes d b ... c a
+                        self.reverse(c, b)
+                    return gain, (a, b, c, d)
+        return None
+
+    def improve_or_opt(self, a):
+        """
+        Look for an Or-opt move taking a segment of up to OR_OPT_LENGTH
+        cities starting or ending at a and putting it, possibly reversed,
+        next to a candidate neighbour of one of its ends.
+        """
+        n = len(self.order)
+        for step in (self.succ, self.pred):
+            cities = [a]
+            for length in range(1, min(OR_OPT_LENGTH, n - 3) + 1):
+                if length > 1:
+                    cities.append(step(cities[-1]))
+                # the segment always goes forward
+                segment = cities if step == self.succ else cities[::-1]
+                move = self.try_segment(segment)
+                if move:
+                    return move
+        return None
+
+    def try_segment(self, segment):
+        rows = self.rows
+        s1, s2 = segment[0], segment[-1]
+        p, q = self.pred(s1), self.succ(s2)
+        removed = rows[p][s1] + rows[s2][q] - rows[p][q]
+        if removed <= EPSILON:
+            return None
+        for end, other_end in ((s1, s2), (s2, s1)):
+            for c in self.neighbours[end]:
+                d_ec = rows[end][c]
+                if d_ec >= removed - EPSILON:
+                    break
+                if c in segment:
+                    continue
+                for d in (self.succ(c), self.pred(c)):
+                    if d in segment:
+                        continue
+                    gain = removed - d_ec - rows[other_end][d] + rows[c][d]
+                    if gain > EPSILON:
+                        self.move_segment(segment, end, c, d)
+                        return gain, (p, q, c, d, s1, s2)
+        return None
+
+    def reverse(self, first, last):
+        """
+        Reverse the path going forward from city first to city last. When
+        shorter, the rest of the tour is reversed instead, which gives the
+        same tour travelled the other way round.
+        """
+        order, pos = self.order, self.pos
+        n = len(order)
+        i, j = pos[first], pos[last]
+        length = (j - i) % n + 1
+        if 2 * length > n:
+            i, j = (j + 1) % n, (i - 1) % n
+            length = n - length
+        for k in range(length // 2):
+            x, y = order[i], order[j]
+            order[i], order[j] = y, x
+            pos[y], pos[x] = i, j
+            i = (i + 1) % n
+            j = (j - 1) % n
+
+    def move_segment(self, segment, end, c, d):
+        """
+        Take the segment out of the tour and put it between the adjacent
+        cities c and d, with its end city next to c. The cities between the
+        segment and its new place shift along, on the shorter side.
+        """
+        order, pos = self.order, self.pos
+        n = len(order)
+        # the segment oriented to go from c to d
+        if end == segment[0]:
+            inserted = segment
+        else:
+            inserted = segment[::-1]
+        # x, then y, going forward
+        if self.succ(c) == d:
+            x, y = c, d
+        else:
+            x, y, inserted = d, c, inserted[::-1]
+
+        length = len(segment)
+        start = pos[segment[0]]
+        after = (pos[x] - start - length) % n + 1
+        if 2 * after <= n - length:
+            # the cities from the segment's successor to x move backward
+            k = start
+            for offset in range(length, length + after):
+                city = order[(start + offset) % n]
+                order[k] = city
+                pos[city] = k
+                k = (k + 1) % n
+            for city in inserted:
+                order[k] = city
+                pos[city] = k
+                k = (k + 1) % n
+        else:
+            # the cities from y to the segment's predecessor move forward
+            k = (start + length - 1) % n
+            for offset in range(1, n - length - after + 1):
+                city = order[(start - offset) % n]
+                order[k] = city
+                pos[city] = k
+                k = (k - 1) % n
+            for city in reversed(inserted):
+                order[k] = city
+                pos[city] = k
+                k = (k - 1) % n
@@ -1,8 +1,9 @@
 import random
 
-from solution import Solution
-from city import City
-from gui import Gui
+import numpy as np
+
+from solution import Solution, evaluate, order_crossover
+from instance import Instance
 import time
 
 def main():
@@ -10,26 +11,21 @@ def main():
     Main function parsing file, initializing UI and launching genetic
     algorithm solving method.
     """
-    # dictionnaire contenant les villes
-    # clé: nom de la ville, valeur: objet City
-    cities = {}
+    # pygame n'est chargé que pour l'affichage, pas par crossover
+    from gui import Gui
 
     file_name = 'data/pb050.txt'
     # file_name = ''
 
     if file_name:
-        with open(file_name, encoding='utf-8') as positions_file:
-            for line in positions_file:
-                # pour chaque ligne, on crée une ville avec les coordonnées
-                # associées
-                cityname, x, y = line.split()
-                cities[cityname] = City(cityname, (int(x), int(y)))
-            gui = Gui(cities, file_name)
+        # villes et matrice des distances entre elles
+        instance = Instance.from_file(file_name)
+        gui = Gui(instance.cities, file_name)
     else:
         gui = Gui()
-        cities = gui.cities
+        instance = Instance(gui.cities)
 
-    cities = list(cities.values())
+    indices = list(range(len(instance)))
     population = []
 
     max_time = 15
@@ -43,10 +39,11 @@ def main():
     # RANGS contient n*0,  (n-1)*1 ... 1*n -> exemple 10, 9,9, 8,8,8, 7,7,7,7, ...
 
     for i in range(POPULATION_SIZE):
-        random.shuffle(cities)
-        population.append(Solution(cities))
+        random.shuffle(indices)
+        population.append(Solution(instance, indices, evaluate=False))
+    evaluate(population)
 
-    pseudo_best = Solution.create_pseudo_best(cities)
+    pseudo_best = Solution.create_pseudo_best(instance)
     # gui.draw_path(pseudo_best, msg="pseudo best with fitness:{}".format(pseudo_best.fitness), color=[255,255,0])
     # gui.wait_for_user_input()
     population.append(pseudo_best)
@@ -63,7 +60,7 @@ def main():
         # trier la population
         population.sort()
 
-        best = Solution(population[0].cities)
+        best = population[0].copy()
 
         # population = population[:HALF] # sélectionne la moitié meilleure
 
@@ -82,16 +79,23 @@ def main():
         random.shuffle(population)
 
         # croisement
+        children = []
         for i in range(0, HALF, 2): # 0 to HALF 2-by-2
             sol1 = population[i]
             sol2 = population[i+1]
-            # ajoute les enfants à la population
             if method_1:
-                population += sol1.crossing(sol2)
+                children += sol1.crossing(sol2)
             else:
-                population += list(crossover(sol1, sol2))
+                children += [
+                    Solution(instance, order, evaluate=False)
+                    for order in crossover(sol1.order, sol2.order)
+                ]
             method_1 = not method_1
 
+        # évalue tous les enfants d'un coup et les ajoute à la population
+        evaluate(children)
+        population += children
+
         # muter 20% des solutions
         [solution.mutate() for solution in random.sample(population, int(rate*len(population)))]
         population.append(best)
@@ -103,7 +107,7 @@ def main():
                 break
         else:
             stagnation = 0
-            gui.draw_path(best, msg=str(best.fitness))
+            gui.draw_path([city.name for city in best.cities], msg=str(best.fitness))
 
         if max_time:
             dt = time.time() - t1
@@ -111,37 +115,25 @@ def main():
 
         old_best = best.fitness
 
-    gui.draw_path(best, msg=str(best.fitness), color=[0,255,0])
+    gui.draw_path([city.name for city in best.cities], msg=str(best.fitness), color=[0,255,0])
     gui.wait_for_user_input()
 
 
 def crossover(x, y, start=2, stop=4):
     """
     Crossover x and y indviduals' genes at indices between start and stop.
+    x and y are sequences holding the same genes in different orders.
 
     The two children are generated and returned as a tuple containing.
     """
-    x,y = x.cities, y.cities
-    x_crossover = tuple(x[start:stop])
-    y_crossover = tuple(y[start:stop])
-    prepared_x = [item if item not in y_crossover else None for item in x]
-    x_shifts = prepared_x[stop:].count(None)
-    prepared_y = [item if item not in x_crossover else None for item in y]
-    y_shifts = prepared_y[stop:].count(None)
-    new_x = [item for item in prepared_x if item is not None]
-    new_y = [item for item in prepared_y if item is not None]
-    new_x = shift_list(new_x, x_shifts)
-    new_y = shift_list(new_y, y_shifts)
-    new_x = new_x[:start] + list(y_crossover) + new_x[start:]
-    new_y = new_y[:start] + list(x_crossover) + new_y[start:]
-    return Solution(new_x), Solution(new_y)
-
-
-def shift_list(items, shifts):
-    """Left shift a list of elements."""
-    for i in range(shifts):
-        items = items[1:] + items[:1]
-    return items
+    # travaille sur les positions des gènes dans x
+    genes = list(x)
+    position = {gene: i for i, gene in enumerate(genes)}
+    new_x, new_y = order_crossover(
+        np.arange(len(genes)), np.array([position[gene] for gene in y]),
+        start, stop
+    )
+    return [genes[i] for i in new_x], [genes[i] for i in new_y]
 
 
 if __name__ == "__main__":
@@ -0,0 +1,133 @@
+"""
+Offspring generation spread over a pool of processes.
+
+The workers attach to the instance's coordinates, distance matrix and
+neighbour lists through shared memory instead of receiving City objects,
+and parents and children travel between processes as index arrays.
+"""
+import multiprocessing
+import os
+import random
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from instance import Instance
+from solution import Solution, evaluate
+
+# instance attached by every worker process
+worker_instance = None
+# shared memory blocks kept open as long as the worker lives
+worker_blocks = None
+
+
+class SharedArrays:
+    """NumPy arrays copied into shared memory blocks."""
+
+    def __init__(self, **arrays):
+        self.blocks = []
+        # name -> (block name, shape, dtype), enough to attach the array
+        self.specs = {}
+        for name, array in arrays.items():
+            block = shared_memory.SharedMemory(
+                create=True, size=max(array.nbytes, 1)
+            )
+            np.ndarray(array.shape, array.dtype, buffer=block.buf)[...] = array
+            self.blocks.append(block)
+            self.specs[name] = (block.name, array.shape, array.dtype.str)
+
+    def close(self):
+        """Release and destroy the blocks."""
+        for block in self.blocks:
+            block.close()
+            block.unlink()
+        self.blocks = []
+
+
+def attach(specs):
+    """
+    Arrays of the shared blocks described by SharedArrays.specs, and the
+    blocks, which must stay open while the arrays are used.
+    """
+    arrays = {}
+    blocks = []
+    for name, (block_name, shape, dtype) in specs.items():
+        block = shared_memory.SharedMemory(name=block_name)
+        arrays[name] = np.ndarray(shape, dtype, buffer=block.buf)
+        blocks.append(block)
+    return arrays, blocks
+
+
+def init_worker(specs):
+    global worker_instance, worker_blocks
+    arrays, worker_blocks = attach(specs)
+    worker_instance = Instance.from_arrays(
+        None, arrays['coords'], arrays['dist'], arrays['neighbours']
+    )
+
+
+def breed(task):
+    """
+    Children of one pair of parents, as (order, fitness) pairs. Every child
+    is mutated with the given rate.
+    """
+    crossover, father, mother, rate, seed = task
+    # seeded by the task rather than the process, so the children do not
+    # depend on which worker breeds them
+    random.seed(seed)
+    children = list(crossover(
+        Solution(worker_instance, *father), Solution(worker_instance, *mother)
+    ))
+    evaluate(children)
+    for child in children:
+        if random.random() < rate:
+            child.mutate()
+    return [(child.order, child.fitness) for child in children]
+
+
+class OffspringPool:
+    """Pool of processes breeding the children of a generation."""
+
+    def __init__(self, instance, processes=None):
+        self.instance = instance
+        self.shared = SharedArrays(
+            coords=instance.coords, dist=instance.dist,
+            neighbours=instance.neighbours
+        )
+        self.pool = multiprocessing.Pool(
+            processes, init_worker, (self.shared.specs,)
+        )
+        self.processes = processes or os.cpu_count()
+
+    def breed(self, pairs, rate):
+        """
+        pairs is a list of (crossover, father, mother), crossover being a
+        module level function taking two solutions and returning children.
+        Returns the evaluated children, mutated with the given rate.
+        """
+        tasks = [
+            (
+                crossover, (father.order, father.fitness),
+                (mother.order, mother.fitness), rate, random.getrandbits(32)
+            )
+            for crossover, father, mother in pairs
+        ]
+        chunksize = max(1, len(tasks) // self.processes)
+        children = []
+        for result in self.pool.map(breed, tasks, chunksize):
+            children += [
+                Solution(self.instance, order, fitness)
+                for order, fitness in result
+            ]
+        return children
+
+    def close(self):
+        self.pool.terminate()
+        self.pool.join()
+        self.shared.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,93 @@
+"""
+Opt-in instrumentation of the genetic algorithm.
+
+The loop calls Profiler.lap at the end of every phase, only when it was
+given a profiler, so a run without one does not pay for it.
+"""
+import cProfile
+import sys
+import time
+from collections import defaultdict
+
+
+class Profiler:
+    """
+    Wall time and number of calls of every phase of a run, and counters
+    such as the number of generations and of evaluations. With cprofile, a
+    cProfile session also runs from start to stop and its statistics are
+    saved to that file.
+    """
+
+    def __init__(self, cprofile=None):
+        self.times = defaultdict(float)
+        self.calls = defaultdict(int)
+        self.counters = defaultdict(int)
+        self.cprofile = cprofile
+        self.session = None
+        self.started = self.last = self.stopped = None
+
+    def start(self):
+        self.started = self.last = time.perf_counter()
+        if self.cprofile:
+            self.session = cProfile.Profile()
+            self.session.enable()
+
+    def stop(self):
+        if self.session:
+            self.session.disable()
+            self.session.dump_stats(self.cprofile)
+            self.session = None
+        self.stopped = time.perf_counter()
+
+    def lap(self, phase):
+        """The time since the previous lap was spent in phase."""
+        now = time.perf_counter()
+        self.times[phase] += now - self.last
+        self.calls[phase] += 1
+        self.last = now
+
+    def count(self, counter, number=1):
+        self.counters[counter] += number
+
+    def summary(self):
+        """
+        Elapsed time, generations and evaluations per second, and the time,
+        calls, mean time per generation and share of every phase.
+        """
+        elapsed = (self.stopped or time.perf_counter()) - self.started
+        generations = self.counters['generations']
+        evaluations = self.counters['evaluations']
+        return {
+            'elapsed': elapsed,
+            'generations': generations,
+            'generations_per_second': generations / elapsed if elapsed else 0.,
+            'evaluations': evaluations,
+            'evaluations_per_second': evaluations / elapsed if elapsed else 0.,
+            'phases': {
+                phase: {
+                    'time': spent,
+                    'calls': self.calls[phase],
+                    'per_generation': spent / generations if generations else 0.,
+                    'share': spent / elapsed if elapsed else 0.,
+                }
+                for phase, spent in sorted(
+                    self.times.items(), key=lambda item: -item[1]
+                )
+            },
+        }
+
+    def report(self, file=sys.stderr):
+        """Print the summary, the slowest phases first."""
+        summary = self.summary()
+        print(
+            "{elapsed:.3f}s, {generations} generations "
+            "({generations_per_second:.1f}/s), {evaluations} evaluations "
+            "({evaluations_per_second:.1f}/s)".format(**summary), file=file
+        )
+        for phase, stats in summary['phases'].items():
+            print(
+                "  {:<32} {time:9.3f}s {share:6.1%} {calls:9} calls".format(
+                    phase, **stats
+                ),
+                file=file
+            )
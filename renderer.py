@@ -0,0 +1,104 @@
+"""
+Display of the solutions decoupled from the solver.
+
+pygame must draw and handle its events from the main thread, so it is the
+solver that runs on another thread and posts its tours to the main one.
+"""
+import multiprocessing
+import threading
+import time
+
+# most frames drawn per second
+FPS = 30
+
+
+class Renderer:
+    """
+    Draws the latest tour posted on a gui, at most fps times per second,
+    so the solver never waits for the display. The mailbox holds a single
+    tour: posting replaces the one not drawn yet. run is called from the
+    main thread, post and close from the solver's.
+    """
+
+    def __init__(self, gui, fps=FPS):
+        self.gui = gui
+        self.interval = 1 / fps
+        self.mailbox = None
+        self.posted = threading.Event()
+        self.running = True
+
+    def post(self, path, msg=''):
+        """
+        Ask for the tour visiting the cities named by path to be drawn. The
+        path must not change afterwards.
+        """
+        self.mailbox = (path, msg)
+        self.posted.set()
+
+    def run(self):
+        """
+        Draw the tours posted until close is called, handling the events of
+        the window meanwhile so it keeps responding.
+        """
+        while True:
+            started = time.perf_counter()
+            self.gui.handle_events()
+            # closed before the last tour is drawn, so it is not lost
+            running = self.running
+            if self.posted.wait(self.interval):
+                # cleared before reading, a tour posted meanwhile is not lost
+                self.posted.clear()
+                # close wakes run up too, maybe before any tour
+                if self.mailbox is not None:
+                    path, msg = self.mailbox
+                    self.gui.draw_path(path, msg=msg)
+            if not running:
+                break
+            time.sleep(
+                max(0., self.interval - (time.perf_counter() - started))
+            )
+
+    def close(self):
+        """No more tours, run returns once the last one is drawn."""
+        self.running = False
+        self.posted.set()
+
+
+def display(gui, tours, fps=FPS):
+    """
+    Consume the (fitness, path, elapsed) tours of ga_iter on a solver
+    thread while the calling thread draws them on the gui. Returns the last
+    one, or raises what the solver raised.
+
+    Closing the window exits while solving. The processes the solver
+    started, its islands, are terminated first: they are not daemons and
+    the exit would wait for them to finish.
+    """
+    renderer = Renderer(gui, fps)
+    found = [None]
+    failed = []
+
+    def solve():
+        try:
+            for tour in tours:
+                found[0] = tour
+                fitness, path, elapsed = tour
+                renderer.post(path, str(fitness))
+        except BaseException as e:
+            failed.append(e)
+        finally:
+            renderer.close()
+
+    # a daemon, leaving the window quits even while solving
+    solver = threading.Thread(target=solve, daemon=True)
+    solver.start()
+    try:
+        renderer.run()
+    except SystemExit:
+        for child in multiprocessing.active_children():
+            child.terminate()
+        raise
+    solver.join()
+    if failed:
+        raise failed[0]
+    return found[0]
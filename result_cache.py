@@ -0,0 +1,139 @@
+"""
+Persistent cache of the best tours found, by instance.
+
+Instances are identified by a hash of their coordinates sorted, and of
+their TSPLIB metric if any, so the same cities read from any file and in
+any order share their tours. The tours are stored with the cities
+numbered in that sorted order. Every instance has a file holding its
+TOURS_KEPT best tours. The least recently used files are removed when the
+cache grows past its size.
+"""
+import hashlib
+import os
+
+import numpy as np
+
+# best tours kept by instance
+TOURS_KEPT = 5
+
+# size of the cache in bytes
+MAX_BYTES = 1 << 28
+
+DEFAULT_DIRECTORY = os.path.join(
+    os.path.expanduser('~'), '.cache', 'tsp', 'results'
+)
+
+
+def ordered_key(instance, order=None):
+    """
+    Hash of the cities of an instance taken in the given order, their own
+    by default. Data depending on how the cities are numbered, such as a
+    checkpointed population, is only valid for the same ordered key.
+    """
+    digest = hashlib.sha256()
+    coords = np.asarray(instance.coords, dtype=np.float64)
+    if order is not None:
+        coords = coords[order]
+    coords = np.ascontiguousarray(coords)
+    digest.update(str(coords.shape).encode())
+    digest.update(coords.tobytes())
+    digest.update(str(instance.metric).encode())
+    return digest.hexdigest()
+
+
+def sorted_cities(instance):
+    """City indices sorted by their coordinates, x first then y."""
+    coords = np.asarray(instance.coords).reshape(-1, 2)
+    return np.lexsort((coords[:, 1], coords[:, 0])).astype(np.int32)
+
+
+def instance_key(instance):
+    """Canonical hash of the cities of an instance, whatever their order."""
+    return ordered_key(instance, sorted_cities(instance))
+
+
+def canonical(order):
+    """
+    Same tour starting from city 0 and going to the smaller of its two
+    neighbours, so a tour is cached once whatever its start and direction.
+    """
+    order = np.asarray(order, dtype=np.int32)
+    order = np.roll(order, -int(np.argmin(order)))
+    if len(order) > 2 and order[1] > order[-1]:
+        order[1:] = order[:0:-1].copy()
+    return order
+
+
+class ResultCache:
+    """Directory of the best tours of every instance solved."""
+
+    def __init__(self, directory=DEFAULT_DIRECTORY, max_bytes=MAX_BYTES,
+                 tours=TOURS_KEPT):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.tours = tours
+
+    def path(self, instance):
+        return os.path.join(self.directory, instance_key(instance) + '.npy')
+
+    def load(self, instance):
+        """Tours cached for the instance as an array of rows, best first."""
+        return sorted_cities(instance)[self.read(instance)]
+
+    def read(self, instance):
+        """Tours of the instance as stored, the cities sorted."""
+        path = self.path(instance)
+        try:
+            tours = np.load(path)
+            # most recently used
+            os.utime(path)
+        except (OSError, ValueError):
+            return np.empty((0, len(instance)), dtype=np.int32)
+        if tours.ndim != 2 or tours.shape[1] != len(instance):
+            return np.empty((0, len(instance)), dtype=np.int32)
+        return tours
+
+    def store(self, instance, solutions):
+        """
+        Keep the best tours among the cached ones and the solutions. Like
+        the instance cache, failing to write is silently ignored.
+        """
+        cities = sorted_cities(instance)
+        # number of every city in the sorted order
+        rank = np.empty_like(cities)
+        rank[cities] = np.arange(len(cities), dtype=np.int32)
+        tours = [self.read(instance)] + [
+            canonical(rank[solution.order])[np.newaxis]
+            for solution in solutions
+        ]
+        tours = np.unique(np.concatenate(tours), axis=0)
+        lengths = instance.tour_lengths(cities[tours])
+        tours = tours[np.argsort(lengths, kind='stable')[:self.tours]]
+
+        path = self.path(instance)
+        temporary = '{}.{}.tmp'.format(path, os.getpid())
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(temporary, 'wb') as tours_file:
+                np.save(tours_file, tours)
+            os.replace(temporary, path)
+            self.evict(keep=path)
+        except OSError:
+            pass
+
+    def evict(self, keep=None):
+        """Remove the least recently used files beyond max_bytes."""
+        entries = []
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if name.endswith('.npy') and path != keep:
+                stat = os.stat(path)
+                entries.append((stat.st_mtime, stat.st_size, path))
+        size = sum(entry[1] for entry in entries)
+        if keep:
+            size += os.path.getsize(keep)
+        for mtime, file_size, path in sorted(entries):
+            if size <= self.max_bytes:
+                break
+            os.remove(path)
+            size -= file_size
@@ -1,6 +0,0 @@
-#!/bin/sh
-
-for i in `seq 1 10`;
-do
-    python MPoyPerez.py --filename data/pb050.txt --nogui
-done
@@ -0,0 +1,443 @@
+"""
+Local solver service.
+
+A long-running asyncio server speaking JSON over HTTP, on a TCP port or a
+Unix socket. Jobs are queued onto a fixed set of solver processes, which
+keep the instances they recently solved warm.
+
+    POST /solve     {"coords": [[x, y], ...] or "file": path,
+                     "names": [...], "maxtime": 10, "stream": false,
+                     "options": {"population_size": 40, ...}}
+                    returns {"job": id, "fitness": f, "path": [...]}, or
+                    with stream, one JSON line per new best tour and a
+                    last one with "event": "done"
+    DELETE /jobs/ID cancels a job, which then returns its best tour so far
+    GET /status     workers, running and queued jobs
+
+When the queue is full, /solve answers 503 at once. A client closing its
+connection cancels its job.
+
+    python service.py --port 8765 --processes 4
+"""
+import asyncio
+import concurrent.futures
+import hashlib
+import itertools
+import json
+import multiprocessing
+import os
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from MPoyPerez import ga_iter
+from instance import Instance
+
+# instances kept by every solver process
+WARM_INSTANCES = 8
+
+# largest request body accepted, in bytes
+MAX_BODY = 1 << 26
+
+# ga_solve options a request may set, the service chooses the others
+OPTIONS = (
+    'maxstagnation', 'local_search', 'population_size', 'eax', 'seed',
+)
+
+REASONS = {
+    200: 'OK', 400: 'Bad Request', 404: 'Not Found',
+    405: 'Method Not Allowed', 503: 'Service Unavailable',
+}
+
+
+"""
+Solver processes
+"""
+
+
+def serve(connection):
+    """
+    Main loop of a solver process. Receives jobs as dicts, sends
+    ('best', fitness, path, elapsed) on every improvement of streamed jobs
+    and ('done', fitness, path, elapsed) or ('error', message, None,
+    elapsed) at the end. 'cancel' stops the job running.
+    """
+    instances = OrderedDict()
+    for job in iter(connection.recv, None):
+        if job == 'cancel':
+            # for a job that ended meanwhile
+            continue
+        start = time.time()
+        try:
+            instance = warm_instance(instances, job)
+
+            def step(generation, population, best, improved):
+                return connection.poll() and connection.recv() == 'cancel'
+
+            # every length yielded is summed from scratch, like the final one
+            for fitness, path, elapsed in ga_iter(
+                instance, job['maxtime'], step=step, **job['options']
+            ):
+                if job['stream']:
+                    connection.send(
+                        ('best', fitness, path, time.time() - start)
+                    )
+            connection.send(('done', fitness, path, time.time() - start))
+        except Exception as e:
+            connection.send(('error', repr(e), None, time.time() - start))
+
+
+def warm_instance(instances, job):
+    """Instance of the job, reused when recently solved."""
+    if 'file' in job:
+        # a file changed since is loaded again
+        stat = os.stat(job['file'])
+        key = ('file', job['file'], stat.st_mtime_ns, stat.st_size)
+    else:
+        key = ('coords', hashlib.sha256(
+            job['coords'].tobytes() + json.dumps(job['names']).encode()
+        ).hexdigest())
+    if key in instances:
+        instances.move_to_end(key)
+        return instances[key]
+
+    if 'file' in job:
+        instance = Instance.from_file(job['file'])
+    else:
+        instance = Instance.from_arrays(
+            np.array(job['names']), job['coords']
+        )
+    instances[key] = instance
+    if len(instances) > WARM_INSTANCES:
+        instances.popitem(last=False)
+    return instance
+
+
+class Worker:
+    """Solver process and the connection to it."""
+
+    def __init__(self):
+        self.connection, child = multiprocessing.Pipe()
+        # not a daemon, so ga_iter may still start processes of its own
+        self.process = multiprocessing.Process(target=serve, args=(child,))
+        self.process.start()
+        child.close()
+
+    def close(self):
+        self.process.terminate()
+        self.process.join()
+        self.connection.close()
+
+
+"""
+Jobs
+"""
+
+
+class Job:
+    """A solve request, from the queue to its result."""
+
+    def __init__(self, number, message):
+        self.number = number
+        self.message = message
+        # latest improvement not sent yet, a single slot
+        self.latest = None
+        self.improved = asyncio.Event()
+        self.result = asyncio.get_running_loop().create_future()
+        self.worker = None
+        self.cancelled = False
+
+    def post(self, event):
+        self.latest = event
+        self.improved.set()
+
+    def cancel(self):
+        """Stop the job, it ends with the best tour found so far."""
+        if self.cancelled or self.result.done():
+            return
+        self.cancelled = True
+        if self.worker:
+            self.worker.connection.send('cancel')
+        else:
+            self.result.set_result(('cancelled', None, None, 0.))
+
+
+def parse_job(request):
+    """Message sent to the solver process for a /solve request body."""
+    if not isinstance(request, dict):
+        raise ValueError("expected a JSON object")
+    try:
+        return read_job(request)
+    except TypeError as e:
+        # a field of the wrong JSON type, such as a list for maxtime
+        raise ValueError("malformed job: {}".format(e))
+
+
+def read_job(request):
+    """parse_job, letting the fields of the wrong type raise TypeError."""
+    options = request.get('options', {})
+    if not isinstance(options, dict):
+        raise ValueError("options must be a JSON object")
+    unknown = set(options) - set(OPTIONS)
+    if unknown:
+        raise ValueError("unknown options {}".format(sorted(unknown)))
+    message = {
+        'maxtime': float(request.get('maxtime', 10)),
+        'stream': bool(request.get('stream', False)),
+        'options': options,
+    }
+    if 'file' in request:
+        message['file'] = str(request['file'])
+    elif 'coords' in request:
+        coords = np.array(request['coords'], dtype=np.float64)
+        if coords.ndim != 2 or coords.shape[1] != 2 or len(coords) < 3:
+            raise ValueError("coords must be at least 3 [x, y] pairs")
+        names = request.get('names') or [str(i) for i in range(len(coords))]
+        if len(names) != len(coords):
+            raise ValueError("expected as many names as coords")
+        message['coords'] = coords
+        message['names'] = [str(name) for name in names]
+    else:
+        raise ValueError("expected coords or file")
+    if message['maxtime'] <= 0:
+        raise ValueError("maxtime must be positive")
+    return message
+
+
+"""
+Service
+"""
+
+
+class SolverService:
+    """
+    HTTP service queuing the jobs onto processes solver processes. At most
+    queue_size jobs wait for a free process, the next ones are refused.
+    """
+
+    def __init__(self, processes=None, queue_size=16):
+        self.processes = processes or multiprocessing.cpu_count()
+        self.queue_size = queue_size
+        self.jobs = {}
+        self.numbers = itertools.count(1)
+        self.server = None
+
+    async def start(self, host='127.0.0.1', port=0, path=None):
+        """
+        Listen on path, a Unix socket, or on host and port, an ephemeral
+        one by default, see address.
+        """
+        self.queue = asyncio.Queue(self.queue_size or 1)
+        # a thread per solver process waits for its messages
+        self.executor = concurrent.futures.ThreadPoolExecutor(self.processes)
+        self.workers = [Worker() for i in range(self.processes)]
+        self.dispatchers = [
+            asyncio.ensure_future(self.dispatch(index))
+            for index in range(self.processes)
+        ]
+        if path:
+            self.server = await asyncio.start_unix_server(self.handle, path)
+        else:
+            self.server = await asyncio.start_server(self.handle, host, port)
+        return self.server
+
+    @property
+    def address(self):
+        return self.server.sockets[0].getsockname()
+
+    async def close(self):
+        self.server.close()
+        await self.server.wait_closed()
+        for dispatcher in self.dispatchers:
+            dispatcher.cancel()
+        await asyncio.gather(*self.dispatchers, return_exceptions=True)
+        for worker in self.workers:
+            worker.close()
+        self.executor.shutdown(wait=False)
+
+    async def dispatch(self, index):
+        """Run the queued jobs, one at a time, on the index-th process."""
+        loop = asyncio.get_running_loop()
+        while True:
+            job = await self.queue.get()
+            if job.cancelled:
+                continue
+            worker = job.worker = self.workers[index]
+            worker.connection.send(job.message)
+            while True:
+                try:
+                    event = await loop.run_in_executor(
+                        self.executor, worker.connection.recv
+                    )
+                except (EOFError, OSError):
+                    # the process died, start another one
+                    event = ('error', 'solver process died', None, 0.)
+                    worker.close()
+                    self.workers[index] = Worker()
+                if event[0] == 'best':
+                    job.post(event)
+                    continue
+                job.result.set_result(event)
+                break
+
+    async def handle(self, reader, writer):
+        try:
+            method, target, body = await read_request(reader)
+            if target == '/solve':
+                if method != 'POST':
+                    return respond(writer, 405, {'error': 'use POST'})
+                await self.solve(json.loads(body or b'null'), reader, writer)
+            elif target == '/status':
+                respond(writer, 200, {
+                    'workers': self.processes,
+                    'running': sum(1 for job in self.jobs.values()
+                                   if job.worker),
+                    'queued': self.queue.qsize(),
+                })
+            elif target.startswith('/jobs/') and method == 'DELETE':
+                job = self.jobs.get(target[len('/jobs/'):])
+                if job is None:
+                    return respond(writer, 404, {'error': 'no such job'})
+                job.cancel()
+                respond(writer, 200, {'job': job.number, 'cancelled': True})
+            else:
+                respond(writer, 404, {'error': 'not found'})
+        except ValueError as e:
+            respond(writer, 400, {'error': str(e)})
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            try:
+                await writer.drain()
+                writer.close()
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def solve(self, request, reader, writer):
+        job = Job(next(self.numbers), parse_job(request))
+        try:
+            self.queue.put_nowait(job)
+        except asyncio.QueueFull:
+            return respond(writer, 503, {'error': 'too many jobs queued'})
+        self.jobs[str(job.number)] = job
+
+        # the client closing the connection cancels the job
+        closed = asyncio.ensure_future(reader.read())
+        closed.add_done_callback(lambda future: job.cancel())
+        try:
+            if job.message['stream']:
+                await self.stream(job, writer)
+            else:
+                await job.result
+                respond(writer, 200, result(job))
+        finally:
+            closed.cancel()
+            del self.jobs[str(job.number)]
+
+    async def stream(self, job, writer):
+        """Write the improvements as JSON lines, then the result."""
+        writer.write(
+            b"HTTP/1.1 200 OK\r\nContent-Type: application/x-ndjson\r\n"
+            b"Connection: close\r\n\r\n"
+        )
+        while not job.result.done():
+            improved = asyncio.ensure_future(job.improved.wait())
+            await asyncio.wait(
+                (improved, job.result), return_when=asyncio.FIRST_COMPLETED
+            )
+            improved.cancel()
+            if job.improved.is_set():
+                job.improved.clear()
+                event, fitness, path, elapsed = job.latest
+                write_line(writer, {
+                    'job': job.number, 'event': event, 'fitness': fitness,
+                    'path': path, 'elapsed': elapsed,
+                })
+                # a slow client gets fewer improvements, not a longer queue
+                await writer.drain()
+        write_line(writer, result(job))
+
+
+def result(job):
+    event, value, path, elapsed = job.result.result()
+    if event == 'error':
+        return {'job': job.number, 'event': event, 'error': value}
+    return {
+        'job': job.number, 'event': event, 'fitness': value, 'path': path,
+        'elapsed': elapsed, 'cancelled': job.cancelled,
+    }
+
+
+"""
+HTTP
+"""
+
+
+async def read_request(reader):
+    """Method, target and body of an HTTP request."""
+    line = await reader.readline()
+    if not line:
+        raise ConnectionError("no request")
+    try:
+        method, target, version = line.decode('latin-1').split()
+    except ValueError:
+        raise ValueError("malformed request line")
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, value = line.decode('latin-1').split(':', 1)
+        headers[name.strip().lower()] = value.strip()
+    length = int(headers.get('content-length', 0))
+    if length > MAX_BODY:
+        raise ValueError("request body too large")
+    body = await reader.readexactly(length) if length else b''
+    return method, target, body
+
+
+def respond(writer, status, payload):
+    body = json.dumps(payload).encode() + b'\n'
+    writer.write(
+        "HTTP/1.1 {} {}\r\nContent-Type: application/json\r\n"
+        "Content-Length: {}\r\nConnection: close\r\n\r\n".format(
+            status, REASONS[status], len(body)
+        ).encode() + body
+    )
+
+
+def write_line(writer, payload):
+    writer.write(json.dumps(payload).encode() + b'\n')
+
+
+async def main(host, port, path, processes, queue_size):
+    service = SolverService(processes, queue_size)
+    await service.start(host, port, path)
+    print("listening on {}".format(path or service.address))
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await service.close()
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="local TSP solver service")
+    parser.add_argument("--host", default='127.0.0.1')
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", metavar="PATH",
+                        help="listen on a Unix socket instead")
+    parser.add_argument("-p", "--processes", type=int,
+                        help="specify the number of solver processes")
+    parser.add_argument("-q", "--queue", type=int, default=16,
+                        help="specify the number of jobs allowed to wait")
+    args = parser.parse_args()
+    try:
+        asyncio.run(main(
+            args.host, args.port, args.unix, args.processes, args.queue
+        ))
+    except KeyboardInterrupt:
+        pass
@@ -1,30 +1,47 @@
-import copy, random
-from operator import attrgetter
+import random
 from functools import total_ordering
 
+import numpy as np
+
+
 @total_ordering
 class Solution:
-    def __init__(self, cities):
+    __slots__ = ('instance', 'order', 'fitness', 'local_optimum')
+
+    def __init__(self, instance, order, fitness=None, evaluate=True):
         """
-        cities is an ordered list of cities, the last one is linked to the
-        first one
+        order is a sequence of the instance's city indices, the last one is
+        linked to the first one. fitness can be given when already known.
+        With evaluate=False, fitness stays None until evaluate() is called
+        on a batch containing the solution.
         """
-        self.cities = copy.copy(cities)
-        self.compute_fitness()
+        self.instance = instance
+        self.order = np.array(order, dtype=np.int32)
+        self.fitness = fitness
+        # set by local_search.two_opt, reset by any change to the order
+        self.local_optimum = False
+        if fitness is None and evaluate:
+            self.compute_fitness()
 
     def compute_fitness(self):
-        self.fitness = 0
-        self.dict = {}
-
-        old_city = self.cities[0]
-        for city in self.cities + [old_city]:
-            distance = old_city.distance_to(city)
-            # add to the fitness the distance between this city and the previous one
-            self.fitness += distance
-            old_city.next = city
-            old_city.dist = distance
-            self.dict[old_city.name] = old_city
-            old_city = city
+        self.fitness = float(self.instance.tour_lengths(self.order))
+
+    @property
+    def successors(self):
+        """successors[c] is the index of the city visited after city c."""
+        successors = np.empty_like(self.order)
+        successors[self.order] = np.roll(self.order, -1)
+        return successors
+
+    @property
+    def cities(self):
+        """City objects in visiting order."""
+        return [self.instance.cities[index] for index in self.order]
+
+    def copy(self):
+        clone = Solution(self.instance, self.order, self.fitness)
+        clone.local_optimum = self.local_optimum
+        return clone
 
     # total_ordering makes solutions comparable from these 2 methods
     def __eq__(self, other):
@@ -41,49 +58,72 @@ class Solution:
         En partant d’une ville au hasard, considérer la ville suivante dans chacun des
         parents et choisir la plus proche. Si celle-ci est déjà présente dans la solution, prendre
         l’autre. Si elle est aussi déjà présente, choisir une ville non présente au hasard.
+
+        Les enfants ne sont pas évalués, voir evaluate().
         """
+        rows = self.instance.rows
+        father_next = self.successors.tolist()
+        mother_next = mother.successors.tolist()
+        n = len(father_next)
+
         children = []
         for i in range(2):
-            father = self
-            cities = []
-            names = [city.name for city in self.cities]
-            chosen_name = random.choice(names)
-            while len(names) > 0:
-                names.remove(chosen_name)
-                current_city = self.dict[chosen_name]
-                cities.append(current_city)
-                from_father = father.dict[chosen_name]
-                from_mother = mother.dict[chosen_name]
-
-                candidates = []
-                if from_father.next.name in names:
-                    candidates += [from_father]
-                if from_mother.next.name in names:
-                    candidates += [from_mother]
-
-                if len(candidates) > 0:
-                    # on peut utlisier un gene de l'un des parents
-                    candidates.sort(key=attrgetter('dist'))
-                    chosen_name = candidates[0].next.name
+            order = []
+            visited = bytearray(n)
+            # villes pas encore visitées et position de chacune dans la
+            # liste, pour en retirer une en O(1) en la remplaçant par la
+            # dernière
+            unvisited = list(range(n))
+            slot = list(range(n))
+            chosen = random.randrange(n)
+            while True:
+                last = unvisited.pop()
+                if last != chosen:
+                    unvisited[slot[chosen]] = last
+                    slot[last] = slot[chosen]
+                visited[chosen] = True
+                order.append(chosen)
+                if not unvisited:
+                    break
+
+                from_father = father_next[chosen]
+                from_mother = mother_next[chosen]
+                if not visited[from_father]:
+                    # on peut utiliser un gene de l'un des parents, le plus
+                    # proche, celui du père en cas d'égalité
+                    row = rows[chosen]
+                    if (not visited[from_mother]
+                            and row[from_mother] < row[from_father]):
+                        chosen = from_mother
+                    else:
+                        chosen = from_father
+                elif not visited[from_mother]:
+                    chosen = from_mother
                 else:
                     # on ne peut pas car 2 villes-next sont deja utilisées dans la nouvelle solution
-                    if names:
-                        chosen_name = random.choice(names)
-            children += [Solution(cities)]
+                    chosen = random.choice(unvisited)
+            children += [Solution(self.instance, order, evaluate=False)]
 
         return children
 
     def mutate(self):
-        # inverse deux blocs (pas indispensable)
-        # ABCDEF devient
-        # CDEFAB
-        # la solution reste la même, ça permet juste de donner des chances au segment FA d'être muté
-        pivot = random.randrange(len(self.cities))
-        self.cities = self.cities[pivot:] + self.cities[:pivot]
+        """Apply one of the mutation operators, chosen randomly."""
+        random.choice(MUTATIONS)(self)
 
-        # i <- borne inférieure, j <- borne supérieure
-        i = random.randrange(len(self.cities)-1)
-        j = random.randrange(i+1, len(self.cities))
+    def swap_blocks(self):
+        """
+        two blocks inversion (not indispensable)
+        ABCDEF becomes CDEFAB
+
+        The solution keeps the same, it only gives more chances to the FA
+        segment to be muted.
+        """
+        pivot = random.randrange(len(self.order))
+        order = np.roll(self.order, -pivot)
+
+        # i <- minimum born, j <- maximum born
+        i = random.randrange(len(order)-1)
+        j = random.randrange(i+1, len(order))
 
         # C
         # D
@@ -92,22 +132,137 @@ class Solution:
         # A <-- j
         # B
 
-        top = self.cities[:i] # CD
-        middle = self.cities[i:j] # EF
-        bottom = self.cities[j:] # AB
-        # reordonne les blocs
-        self.cities = middle + top + bottom # EFCDAB
+        if i == 0:
+            # no top block, the tour stays the same
+            return
+
+        # only the three edges between the blocks change:
+        # D-E, F-A and B-C become F-C, D-A and B-E
+        rows = self.instance.rows
+        d, e, f, a, b, c = (
+            order[i-1], order[i], order[j-1], order[j], order[-1], order[0]
+        )
+        self.fitness += (
+            rows[f][c] + rows[d][a] + rows[b][e]
+            - rows[d][e] - rows[f][a] - rows[b][c]
+        )
+
+        top = order[:i]  # CD
+        middle = order[i:j]  # EF
+        bottom = order[j:]  # AB
+        # tidying block
+        self.order = np.concatenate((middle, top, bottom))  # EFCDAB
+        self.local_optimum = False
+
+    def reverse_segment(self):
+        """
+        Reverse the cities between two random positions (a 2-opt move).
+        ABCDEF becomes ABEDCF
+        """
+        n = len(self.order)
+        i = random.randrange(n-1)
+        j = random.randrange(i+1, n)
+        self.reverse(i, j)
+
+    def reverse_to_neighbour(self):
+        """
+        2-opt move joining a random city to one of its candidate neighbours,
+        so only edges between close cities are tried.
+        """
+        order = self.order
+        i = random.randrange(len(order))
+        neighbour = random.choice(self.instance.neighbours[order[i]])
+        j = int(np.flatnonzero(order == neighbour)[0])
+        if j > i:
+            # ABCDEF, joining B to E gives ABEDCF
+            self.reverse(i+1, j)
+        elif j < i:
+            # ABCDEF, joining E to B gives ADCBEF
+            self.reverse(j, i-1)
+
+    def reverse(self, i, j):
+        """Reverse the cities from position i to position j, both included."""
+        order = self.order
+        n = len(order)
+        if i >= j or j - i == n - 1:
+            # reversing the whole tour gives the same tour
+            return
+
+        # A-B and E-F become A-E and B-F
+        rows = self.instance.rows
+        a, b, e, f = order[i-1], order[i], order[j], order[(j+1) % n]
+        self.fitness += rows[a][e] + rows[b][f] - rows[a][b] - rows[e][f]
+
+        order[i:j+1] = order[i:j+1][::-1]
+        self.local_optimum = False
+
+    def insert_city(self):
+        """
+        Move a random city between two other consecutive cities.
+        ABCDEF becomes ACDEBF
+        """
+        order = self.order
+        i = random.randrange(len(order))
+        city = order[i]
+        others = np.delete(order, i)
+        # the city goes right before others[k]
+        k = random.randrange(len(others))
+
+        rows = self.instance.rows
+        before, after = order[i-1], order[(i+1) % len(order)]
+        u, v = others[k-1], others[k]
+        self.fitness += (
+            rows[before][after] - rows[before][city] - rows[city][after]
+            + rows[u][city] + rows[city][v] - rows[u][v]
+        )
 
-        self.compute_fitness()
+        self.order = np.insert(others, k, city)
+        self.local_optimum = False
 
     @staticmethod
-    def create_pseudo_best(cities):
-        ordered_cities = []
-        city = cities[0]
-        ordered_cities.append(city)
-        cities.remove(city)
-        while cities:
-            city = city.get_closest(cities)
-            ordered_cities.append(city)
-            cities.remove(city)
-        return Solution(ordered_cities)
\ No newline at end of file
+    def create_pseudo_best(instance):
+        """Nearest neighbour tour starting from the first city."""
+        return Solution(instance, instance.nearest_neighbour_tour())
+
+
+def evaluate(solutions):
+    """
+    Compute the fitness of all the solutions, which share the same instance,
+    with a single gather over the distance matrix.
+    """
+    if not solutions:
+        return
+    orders = np.stack([solution.order for solution in solutions])
+    lengths = solutions[0].instance.tour_lengths(orders)
+    for solution, fitness in zip(solutions, lengths.tolist()):
+        solution.fitness = fitness
+
+
+def order_crossover(x, y, start, stop):
+    """
+    OX crossover of two arrays of city indices: each child takes the other
+    parent's genes between start and stop and keeps its own genes in order
+    around them. Returns both children as arrays.
+    """
+    return order_child(x, y, start, stop), order_child(y, x, start, stop)
+
+
+def order_child(x, y, start, stop):
+    section = y[start:stop]
+    # genes of x that are not in y's section
+    in_section = np.zeros(len(x), dtype=bool)
+    in_section[section] = True
+    kept = ~in_section[x]
+    rest = x[kept]
+    # the genes removed after stop shift the rest to the left
+    shifts = len(x) - stop - np.count_nonzero(kept[stop:])
+    rest = np.roll(rest, -shifts)
+    return np.concatenate((rest[:start], section, rest[start:]))
+
+
+# operators used by Solution.mutate, each one updates the fitness from the
+# edges it changes instead of walking the whole tour again
+MUTATIONS = (
+    Solution.swap_blocks, Solution.reverse_segment, Solution.insert_city,
+    Solution.reverse_to_neighbour
+)
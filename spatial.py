@@ -0,0 +1,210 @@
+"""
+Spatial index over the city coordinates.
+"""
+import heapq
+from math import inf
+
+import numpy as np
+
+# most points held by a leaf of the k-d tree
+LEAF_SIZE = 8
+
+
+class KDTree:
+    """
+    k-d tree over a set of points, answering nearest point queries. Every
+    node knows how many of its points are left, so points can be removed
+    and the empty parts of the plane are skipped: it tracks the cities not
+    visited yet while building a tour, however unevenly they are spread.
+    """
+
+    def __init__(self, coords, leaf_size=LEAF_SIZE):
+        """
+        coords is an (n, 2) array, leaf_size the most points held by a
+        leaf.
+        """
+        coords = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+        self.xs = coords[:, 0].tolist()
+        self.ys = coords[:, 1].tolist()
+        self.count = len(coords)
+
+        # bounding box, children and parent of every node, the points of
+        # the leaves and the number of points left under every node
+        self.boxes = []
+        self.children = []
+        self.parent = []
+        self.points = []
+        self.left = []
+        # leaf of every point and its position in the leaf's list, for O(1)
+        # removal
+        self.leaf = [0] * self.count
+        self.slot = [0] * self.count
+
+        pending = [(np.arange(self.count), -1, 0)]
+        while pending:
+            indices, parent, side = pending.pop()
+            node = len(self.boxes)
+            if parent >= 0:
+                self.children[parent][side] = node
+            self.parent.append(parent)
+            self.left.append(len(indices))
+            if not len(indices):
+                self.boxes.append((inf, inf, -inf, -inf))
+                self.children.append(None)
+                self.points.append([])
+                continue
+            points = coords[indices]
+            low, high = points.min(axis=0), points.max(axis=0)
+            self.boxes.append(
+                (float(low[0]), float(low[1]), float(high[0]), float(high[1]))
+            )
+            if len(indices) <= leaf_size:
+                self.children.append(None)
+                self.points.append(indices.tolist())
+                for slot, index in enumerate(self.points[node]):
+                    self.leaf[index] = node
+                    self.slot[index] = slot
+                continue
+            # split the widest side at its median
+            axis = int(np.argmax(high - low))
+            half = len(indices) // 2
+            order = np.argpartition(points[:, axis], half)
+            self.children.append([None, None])
+            self.points.append(None)
+            pending.append((indices[order[half:]], node, 1))
+            pending.append((indices[order[:half]], node, 0))
+
+    def __len__(self):
+        return self.count
+
+    def remove(self, index):
+        """Remove a point from the tree, by swapping it with the last one."""
+        node = self.leaf[index]
+        points = self.points[node]
+        last = points.pop()
+        if last != index:
+            slot = self.slot[index]
+            points[slot] = last
+            self.slot[last] = slot
+        while node >= 0:
+            self.left[node] -= 1
+            node = self.parent[node]
+        self.count -= 1
+
+    def nearest(self, index):
+        """
+        Index of the remaining point closest to the given one, or None when
+        the tree is empty. The given point itself must have been removed.
+        """
+        if not self.count:
+            return None
+        xs, ys, boxes, children = self.xs, self.ys, self.boxes, self.children
+        points, left = self.points, self.left
+        x, y = xs[index], ys[index]
+
+        best, bound = None, inf
+        # nodes to visit with the squared distance from the point to them
+        pending = [(0., 0)]
+        while pending:
+            reach, node = pending.pop()
+            if reach >= bound or not left[node]:
+                continue
+            if children[node] is None:
+                for other in points[node]:
+                    dx, dy = xs[other] - x, ys[other] - y
+                    dist = dx*dx + dy*dy
+                    if dist < bound:
+                        best, bound = other, dist
+                continue
+            near, far = children[node]
+            near_reach = box_distance(boxes[near], x, y)
+            far_reach = box_distance(boxes[far], x, y)
+            # the closer child is visited first, its points bound the other
+            if near_reach > far_reach:
+                pending.append((near_reach, near))
+                pending.append((far_reach, far))
+            else:
+                pending.append((far_reach, far))
+                pending.append((near_reach, near))
+        return best
+
+    def k_nearest(self, index, k):
+        """
+        Indices of the k remaining points closest to the given one, closest
+        first. The given point itself is left out.
+        """
+        if k <= 0:
+            return []
+        xs, ys, boxes, children = self.xs, self.ys, self.boxes, self.children
+        points, left = self.points, self.left
+        x, y = xs[index], ys[index]
+
+        # the k closest points seen so far, as a heap of (-distance, index)
+        found = []
+        bound = inf
+        pending = [(0., 0)]
+        while pending:
+            reach, node = pending.pop()
+            if reach >= bound or not left[node]:
+                continue
+            if children[node] is None:
+                for other in points[node]:
+                    if other == index:
+                        continue
+                    dx, dy = xs[other] - x, ys[other] - y
+                    dist = dx*dx + dy*dy
+                    if dist < bound:
+                        if len(found) < k:
+                            heapq.heappush(found, (-dist, other))
+                        else:
+                            heapq.heapreplace(found, (-dist, other))
+                        if len(found) == k:
+                            bound = -found[0][0]
+                continue
+            near, far = children[node]
+            near_reach = box_distance(boxes[near], x, y)
+            far_reach = box_distance(boxes[far], x, y)
+            if near_reach > far_reach:
+                pending.append((near_reach, near))
+                pending.append((far_reach, far))
+            else:
+                pending.append((far_reach, far))
+                pending.append((near_reach, near))
+        return [other for dist, other in sorted(found, reverse=True)]
+
+
+def box_distance(box, x, y):
+    """Squared distance from (x, y) to the closest point of the box."""
+    low_x, low_y, high_x, high_y = box
+    dx = low_x - x if x < low_x else x - high_x if x > high_x else 0.
+    dy = low_y - y if y < low_y else y - high_y if y > high_y else 0.
+    return dx*dx + dy*dy
+
+
+def nearest_neighbour_tour(coords, start=0):
+    """
+    Tour starting from the start city and always going to the closest city
+    not visited yet, as a list of indices.
+    """
+    tree = KDTree(coords)
+    city = start
+    order = [city]
+    tree.remove(city)
+    while len(tree):
+        city = tree.nearest(city)
+        tree.remove(city)
+        order.append(city)
+    return order
+
+
+def neighbour_lists(coords, k):
+    """
+    (n, k) int32 array holding the indices of the k closest cities of
+    every city, closest first.
+    """
+    tree = KDTree(coords)
+    k = min(k, len(tree) - 1)
+    neighbours = np.empty((len(tree), max(k, 0)), dtype=np.int32)
+    for index in range(len(tree)):
+        neighbours[index] = tree.k_nearest(index, k)
+    return neighbours
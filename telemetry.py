@@ -0,0 +1,87 @@
+"""
+Convergence telemetry of the genetic algorithm as JSON lines.
+
+Every record holds the generation, the time elapsed since the start of
+the run, the best, mean and worst fitness of the population and the
+number of generations since the last improvement. The records go through
+a large write buffer, so the loop does not wait for the file or the
+socket.
+"""
+import json
+import socket
+import sys
+import time
+
+# bytes buffered before writing to the file or the socket
+BUFFER_SIZE = 1 << 16
+
+
+class Telemetry:
+    """
+    Stream of the records of a run. target is a file name, '-' for the
+    standard output, 'tcp://host:port' or 'unix:///path' for a socket, or
+    an already opened text file. With every='generation' a record is
+    written after every generation, with every='improvement' only when the
+    best fitness improved.
+    """
+
+    def __init__(self, target, every='improvement'):
+        if every not in ('generation', 'improvement'):
+            raise ValueError("every must be 'generation' or 'improvement'")
+        self.every = every
+        self.connection = None
+        self.owned = True
+        if target == '-':
+            self.stream, self.owned = sys.stdout, False
+        elif isinstance(target, str) and target.startswith('tcp://'):
+            host, port = target[len('tcp://'):].rsplit(':', 1)
+            self.connection = socket.create_connection((host, int(port)))
+        elif isinstance(target, str) and target.startswith('unix://'):
+            self.connection = socket.socket(socket.AF_UNIX)
+            self.connection.connect(target[len('unix://'):])
+        elif isinstance(target, str):
+            self.stream = open(target, 'w', buffering=BUFFER_SIZE)
+        else:
+            self.stream, self.owned = target, False
+        if self.connection:
+            self.stream = self.connection.makefile('w', buffering=BUFFER_SIZE)
+        self.begin()
+
+    def begin(self):
+        """Start of the run the elapsed times are measured from."""
+        self.start = time.time()
+        self.generation = 0
+        self.stagnation = 0
+
+    def record(self, generation, population, best, improved):
+        """Step callback of genetic_algorithm."""
+        self.generation = generation
+        self.stagnation = 0 if improved else self.stagnation + 1
+        if improved or self.every == 'generation':
+            self.write(generation, population, best)
+
+    def finish(self, best):
+        """Last record, of the solution returned after the final polish."""
+        self.write(self.generation, [best], best, final=True)
+
+    def write(self, generation, population, best, **extra):
+        fitnesses = [solution.fitness for solution in population]
+        record = {
+            'generation': generation,
+            'elapsed': time.time() - self.start,
+            'best': best.fitness,
+            'mean': sum(fitnesses) / len(fitnesses),
+            'worst': max(fitnesses),
+            'stagnation': self.stagnation,
+        }
+        record.update(extra)
+        self.stream.write(json.dumps(record) + '\n')
+
+    def close(self):
+        """Flush the records and close what was opened."""
+        if self.owned:
+            self.stream.close()
+        else:
+            self.stream.flush()
+        if self.connection:
+            self.connection.close()
@@ -0,0 +1,31 @@
+"""Multi-run statistics unit tests."""
+import pytest
+
+import benchmark
+
+
+def test_mann_whitney():
+    """Exact p-value for small samples, approximate one otherwise."""
+    assert benchmark.mann_whitney([1, 2, 3], [4, 5, 6]) == (0, 0.1)
+    assert benchmark.mann_whitney([4, 5, 6], [1, 2, 3]) == (9, 0.1)
+    u, p = benchmark.mann_whitney([1, 1, 2], [2, 3, 3])
+    assert u == 0.5 and p == pytest.approx(0.110, abs=1e-3)
+    assert sum(benchmark.u_distribution(4, 5)) == 126
+
+
+def test_benchmark(tmp_path):
+    """Same seeds, same runs; the report holds every configuration."""
+    report = benchmark.benchmark(
+        [('base', {'maxstagnation': 5}), ('again', {'maxstagnation': 5})],
+        'data/pb010.txt', runs=3, processes=0
+    )
+    base, again = report['summaries']['base'], report['summaries']['again']
+    for key in ('runs', 'mean', 'stdev', 'best', 'worst'):
+        assert base[key] == again[key]
+    assert base['runs'] == 3
+    assert base['best'] <= base['median'] <= base['worst']
+    assert base['best'] == report['target'] and base['reached'] >= 1
+    comparison = report['comparisons'][0]
+    assert comparison['length']['p_value'] == 1
+    benchmark.write_csv(report, str(tmp_path / "report.csv"))
+    assert len((tmp_path / "report.csv").read_text().splitlines()) == 3
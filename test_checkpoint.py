@@ -0,0 +1,94 @@
+"""Checkpoint and resume tests."""
+import os
+
+import pytest
+
+import MPoyPerez
+from checkpoint import Checkpoint
+from instance import Instance
+
+
+class Killed(Exception):
+    """The run was killed."""
+
+
+def killed(generation, population, best, improved):
+    """Ends the run as if it was killed after 15 generations."""
+    if generation == 15:
+        raise Killed
+
+
+def test_resume(tmp_path):
+    """A run killed and resumed ends as if it never stopped."""
+    file = str(tmp_path / "run.npz")
+    generations = []
+
+    def count(generation, population, best, improved):
+        generations.append(generation)
+
+    expected, path = MPoyPerez.ga_solve(
+        'data/pb050.txt', False, maxstagnation=20, seed=11, step=count
+    )
+    last = generations[-1]
+
+    # a killed run does not remove its checkpoint
+    with pytest.raises(Killed):
+        MPoyPerez.ga_solve(
+            'data/pb050.txt', False, maxstagnation=20, seed=11, step=killed,
+            checkpoint=Checkpoint(file, interval=0)
+        )
+    assert os.path.exists(file)
+
+    generations.clear()
+    # the random generator is restored whatever the seed
+    resumed, path = MPoyPerez.ga_solve(
+        'data/pb050.txt', False, maxstagnation=20, seed=99, step=count,
+        checkpoint=file, resume=True
+    )
+    # a resumed run first yields the tour it starts from, of the same length
+    # as the one yielded before it stopped but maybe not the same tour
+    assert generations[0] == 15 and generations[-1] == last
+    assert resumed == expected
+    assert not os.path.exists(file)
+
+
+def test_other_instance(tmp_path):
+    file = str(tmp_path / "run.npz")
+    with pytest.raises(Killed):
+        MPoyPerez.ga_solve(
+            'data/pb010.txt', False, maxstagnation=20, seed=11, step=killed,
+            checkpoint=Checkpoint(file, interval=0)
+        )
+    with pytest.raises(ValueError):
+        Checkpoint(file).load(Instance.from_file('data/pb020.txt'))
+
+
+def test_closed_run(tmp_path):
+    """A closed ga_iter keeps its checkpoint, a finished one removes it."""
+    file = str(tmp_path / "run.npz")
+    instance = Instance.from_file('data/pb200.txt')
+    tours = MPoyPerez.ga_iter(
+        instance, maxstagnation=20, seed=11,
+        checkpoint=Checkpoint(file, interval=0)
+    )
+    next(tours)
+    next(tours)
+    tours.close()
+    assert os.path.exists(file)
+
+    for tour in MPoyPerez.ga_iter(
+        instance, maxstagnation=20, checkpoint=file, resume=True
+    ):
+        assert os.path.exists(file)
+    assert not os.path.exists(file)
+
+
+def test_write_error(tmp_path):
+    """A save that cannot be written fails the run, though written aside."""
+    file = str(tmp_path / "missing" / "run.npz")
+    with pytest.raises(FileNotFoundError):
+        MPoyPerez.ga_solve(
+            'data/pb020.txt', False, maxstagnation=5, seed=11,
+            checkpoint=Checkpoint(file, interval=0)
+        )
+    assert not os.listdir(str(tmp_path))
@@ -0,0 +1,49 @@
+"""Edge assembly crossover unit tests."""
+import random
+
+from solution import Solution, evaluate
+from eax import adjacency, ab_cycles, eax_crossover
+
+
+def make_parents(instance):
+    """Two random parents on the instance."""
+    size = len(instance)
+    return [
+        Solution(instance, random.sample(range(size), size)) for i in range(2)
+    ]
+
+
+def test_ab_cycles(random_instance):
+    """Every edge found in only one parent is in exactly one AB-cycle."""
+    random.seed(7)
+    father, mother = make_parents(random_instance(40))
+    father_adj = adjacency(father.order.tolist())
+    mother_adj = adjacency(mother.order.tolist())
+    father_edges = {
+        frozenset((u, v)) for u in range(40) for v in father_adj[u]
+    }
+    mother_edges = {
+        frozenset((u, v)) for u in range(40) for v in mother_adj[u]
+    }
+
+    found = []
+    for cycle in ab_cycles(father_adj, mother_adj):
+        assert len(cycle) % 2 == 0
+        for j, city in enumerate(cycle):
+            edge = frozenset((city, cycle[(j + 1) % len(cycle)]))
+            assert edge in (father_edges if j % 2 == 0 else mother_edges)
+            found.append(edge)
+    assert sorted(map(sorted, found)) == sorted(
+        map(sorted, father_edges ^ mother_edges)
+    )
+
+
+def test_eax_crossover(random_instance):
+    """Children are complete tours."""
+    random.seed(8)
+    for size in (5, 30, 80):
+        father, mother = make_parents(random_instance(size))
+        children = eax_crossover(father, mother)
+        evaluate(children)
+        for child in children:
+            assert sorted(child.order.tolist()) == list(range(size))
@@ -0,0 +1,146 @@
+"""ga_solve unit tests."""
+from math import hypot, isclose
+import multiprocessing
+import os
+import random
+
+import pytest
+
+import MPoyPerez
+from instance import Instance
+from profiler import Profiler
+
+
+def read_cities(file):
+    """Positions of the cities by name."""
+    with open(file) as positions_file:
+        return {
+            name: (int(x), int(y))
+            for name, x, y in (line.split() for line in positions_file)
+        }
+
+
+def check(file, length, path):
+    """The path visits every city once and has the given length."""
+    cities = read_cities(file)
+    assert sorted(path) == sorted(cities)
+    total = sum(
+        hypot(cities[a][0] - cities[b][0], cities[a][1] - cities[b][1])
+        for a, b in zip(path, path[1:] + path[:1])
+    )
+    assert isclose(total, length)
+
+
+def test_ga_solve():
+    """Single population solve."""
+    length, path = MPoyPerez.ga_solve('data/pb020.txt', False, 1)
+    check('data/pb020.txt', length, path)
+
+
+def test_ga_solve_islands():
+    """Island model solve."""
+    length, path = MPoyPerez.ga_solve(
+        'data/pb020.txt', False, 1, islands=2, migration=2
+    )
+    check('data/pb020.txt', length, path)
+
+
+def test_ga_solve_dead_island(monkeypatch):
+    """An island dying without a result is left out, all of them raise."""
+    run_island = MPoyPerez.run_island
+
+    def dying_island(*args):
+        # the island number
+        if args[4] == 0:
+            os._exit(1)
+        run_island(*args)
+
+    monkeypatch.setattr(MPoyPerez, 'ISLAND_POLL', 0.1)
+    monkeypatch.setattr(MPoyPerez, 'run_island', dying_island)
+    length, path = MPoyPerez.ga_solve(
+        'data/pb020.txt', False, 1, islands=2, migration=2
+    )
+    check('data/pb020.txt', length, path)
+
+    monkeypatch.setattr(MPoyPerez, 'run_island', lambda *args: os._exit(1))
+    with pytest.raises(RuntimeError):
+        MPoyPerez.ga_solve('data/pb020.txt', False, 1, islands=2)
+
+
+def test_ga_solve_workers():
+    """Children bred by a pool of processes."""
+    length, path = MPoyPerez.ga_solve(
+        'data/pb020.txt', False, 1, population_size=40, workers=2
+    )
+    check('data/pb020.txt', length, path)
+
+
+def test_ga_solve_profile():
+    """Every generation goes through the timed phases."""
+    profiler = Profiler()
+    length, path = MPoyPerez.ga_solve(
+        'data/pb020.txt', False, 1, profile=profiler
+    )
+    check('data/pb020.txt', length, path)
+    summary = profiler.summary()
+    generations = summary['generations']
+    assert generations > 0 and summary['evaluations'] > 0
+    for phase in ('sort', 'selection', 'evaluate', 'mutate'):
+        assert summary['phases'][phase]['calls'] == generations
+    assert sum(
+        phase['time'] for phase in summary['phases'].values()
+    ) <= summary['elapsed']
+
+
+def test_ga_iter():
+    """Every tour yielded is better than the previous one, the last one is
+    the one ga_solve returns."""
+    instance = Instance.from_file('data/pb050.txt')
+    found = list(MPoyPerez.ga_iter(instance, maxstagnation=20, seed=3))
+    lengths = [length for length, path, elapsed in found]
+    assert lengths == sorted(lengths, reverse=True)
+    assert len(set(lengths)) == len(lengths)
+    for length, path, elapsed in found:
+        check('data/pb050.txt', length, path)
+    assert [elapsed for length, path, elapsed in found] == sorted(
+        elapsed for length, path, elapsed in found
+    )
+    length, path, elapsed = found[-1]
+    assert all(type(name) is str for name in path)
+    assert MPoyPerez.ga_solve(
+        'data/pb050.txt', False, maxstagnation=20, seed=3
+    ) == (length, path)
+
+
+def test_ga_iter_rounding():
+    """Mutations drifting the fitness by rounding errors are no improvement."""
+    instance = Instance.from_file('data/pb050.txt')
+    for seed in range(5):
+        lengths = [
+            length for length, path, elapsed in MPoyPerez.ga_iter(
+                instance, maxstagnation=30, local_search=False, seed=seed
+            )
+        ]
+        assert all(b < a for a, b in zip(lengths, lengths[1:]))
+
+
+def test_caller_seed():
+    """Without a seed, the random state set by the caller is kept."""
+    results = []
+    for i in range(2):
+        random.seed(8)
+        results.append(
+            MPoyPerez.ga_solve('data/pb050.txt', False, maxstagnation=20)
+        )
+    assert results[0] == results[1]
+
+
+def test_ga_iter_close():
+    """Closing the generator stops the workers at once."""
+    instance = Instance.from_file('data/pb050.txt')
+    tours = MPoyPerez.ga_iter(instance, 60, population_size=40, workers=2)
+    length, path, elapsed = next(tours)
+    check('data/pb050.txt', length, path)
+    assert multiprocessing.active_children()
+    tours.close()
+    assert not multiprocessing.active_children()
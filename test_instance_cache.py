@@ -0,0 +1,34 @@
+"""Binary instance cache unit tests."""
+import numpy as np
+
+from instance import Instance
+
+
+def test_cache_reused(tmp_path):
+    """A second load memory-maps the arrays computed by the first one."""
+    file = tmp_path / "cities.txt"
+    file.write_text("".join(
+        "v{} {} {}\n".format(i, i * 7 % 13, i * 5 % 11) for i in range(20)
+    ))
+    first = Instance.from_file(str(file))
+    dist, neighbours = first.dist, first.neighbours
+
+    second = Instance.from_file(str(file))
+    assert isinstance(second.coords, np.memmap)
+    assert isinstance(second._dist, np.memmap)
+    assert second.names.tolist() == first.names.tolist()
+    assert np.array_equal(second.dist, dist)
+    assert np.array_equal(second.neighbours, neighbours)
+
+
+def test_cache_stale(tmp_path):
+    """Changing the file invalidates its cache."""
+    file = tmp_path / "cities.txt"
+    file.write_text("a 0 0\nb 3 4\nc 6 8\n")
+    Instance.from_file(str(file)).dist
+    file.write_text("a 0 0\nb 1 0\n")
+
+    instance = Instance.from_file(str(file))
+    assert instance.names.tolist() == ["a", "b"]
+    assert instance._dist is None
+    assert instance.dist.tolist() == [[0, 1], [1, 0]]
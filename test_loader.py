@@ -0,0 +1,30 @@
+"""City file loader unit tests."""
+from loader import load_cities
+
+
+def test_load_cities(tmp_path):
+    """Chunks always end at the end of a line."""
+    file = tmp_path / "cities.txt"
+    file.write_text("v0 375 438\nv1 193 432\n\nv2 219 411\r\nville_3 2.5 -1")
+    for chunk_size in (1, 7, 100):
+        names, coords = load_cities(str(file), chunk_size)
+        assert names.tolist() == ["v0", "v1", "v2", "ville_3"]
+        assert coords.tolist() == [
+            [375, 438], [193, 432], [219, 411], [2.5, -1]
+        ]
+
+
+def test_load_empty(tmp_path):
+    """An empty file has no cities."""
+    file = tmp_path / "empty.txt"
+    file.write_text("")
+    names, coords = load_cities(str(file))
+    assert len(names) == 0 and coords.shape == (0, 2)
+
+
+def test_load_utf8(tmp_path):
+    """City names are read as UTF-8."""
+    file = tmp_path / "villes.txt"
+    file.write_text("Zürich 1 2\nNeuchâtel 3 4\n", encoding="utf-8")
+    names, coords = load_cities(str(file), 12)
+    assert names.tolist() == ["Zürich", "Neuchâtel"]
@@ -0,0 +1,70 @@
+"""Local search unit tests."""
+import random
+
+from city import City
+from instance import Instance
+from solution import Solution
+from local_search import LocalSearch, two_opt
+
+
+def test_two_opt_uncrosses():
+    """The crossing edges of a square are removed."""
+    instance = Instance([
+        City(name, position) for name, position in (
+            ("a", (0, 0)), ("b", (10, 0)), ("c", (10, 10)), ("d", (0, 10)),
+            ("e", (5, -1)), ("f", (11, 5))
+        )
+    ])
+    # a-c and b-d cross
+    solution = Solution(instance, [0, 4, 2, 5, 1, 3])
+    gain = two_opt(solution)
+    assert gain > 0
+    expected = Solution(instance, solution.order).fitness
+    assert abs(solution.fitness - expected) < 1e-9
+    assert solution.local_optimum
+
+
+def test_two_opt_random(random_instance):
+    """Local search keeps a valid tour and reports its gain."""
+    random.seed(5)
+    instance = random_instance(60)
+    order = list(range(60))
+    random.shuffle(order)
+    solution = Solution(instance, order)
+    before = solution.fitness
+    gain = two_opt(solution)
+    assert sorted(solution.order.tolist()) == list(range(60))
+    assert abs(before - gain - solution.fitness) < 1e-6
+
+
+def test_local_optimum(random_instance):
+    """No move is left in a tour flagged as a local optimum."""
+    random.seed(7)
+    for tour in range(400):
+        n = random.randint(5, 60)
+        instance = random_instance(n)
+        solution = Solution(instance, random.sample(range(n), n))
+        two_opt(solution)
+        assert solution.local_optimum
+        assert two_opt(solution.copy()) == 0
+
+
+def test_move_segment():
+    """Segments are moved in place, on either side of the tour."""
+    instance = Instance([City("v{}".format(i), (i, 0)) for i in range(8)])
+    assert instance.neighbour_rows is instance.neighbour_rows
+    for segment, end, c, d, expected in (
+        # the cities after the segment move back
+        ([1, 2], 1, 4, 5, [0, 3, 4, 1, 2, 5, 6, 7]),
+        # the cities before it move forward
+        ([5, 6], 6, 1, 2, [0, 1, 6, 5, 2, 3, 4, 7]),
+        # next to the predecessor of c, reversed
+        ([0], 0, 5, 4, [1, 2, 3, 4, 0, 5, 6, 7]),
+    ):
+        search = LocalSearch(Solution(instance, range(8)))
+        search.move_segment(segment, end, c, d)
+        rotation = search.order.index(expected[0])
+        assert search.order[rotation:] + search.order[:rotation] == expected
+        assert all(
+            search.order[search.pos[city]] == city for city in range(8)
+        )
@@ -0,0 +1,102 @@
+"""Renderer unit tests."""
+import multiprocessing
+import sys
+import threading
+import time
+
+import pytest
+
+from renderer import Renderer, display
+
+
+class RecordingGui:
+    """Gui remembering what it drew and from which thread, slowly."""
+
+    def __init__(self):
+        self.drawn = []
+        self.threads = set()
+
+    def handle_events(self):
+        self.threads.add(threading.current_thread())
+
+    def draw_path(self, path, msg=""):
+        self.threads.add(threading.current_thread())
+        time.sleep(0.01)
+        self.drawn.append(msg)
+
+
+def test_latest_tour_drawn():
+    """Posting never waits and only the latest tour matters."""
+    gui = RecordingGui()
+    renderer = Renderer(gui, fps=20)
+
+    def post():
+        for i in range(1000):
+            renderer.post(None, str(i))
+        time.sleep(0.2)
+        renderer.close()
+
+    poster = threading.Thread(target=post)
+    started = time.perf_counter()
+    poster.start()
+    renderer.run()
+    poster.join()
+    assert time.perf_counter() - started < 1
+    assert gui.drawn[-1] == "999"
+    assert len(gui.drawn) <= 8
+
+
+def test_display_main_thread():
+    """The tours are drawn by the calling thread, the last is returned."""
+    gui = RecordingGui()
+
+    def tours():
+        for i in range(5):
+            time.sleep(0.01)
+            yield 10 - i, ["v{}".format(i)], i
+
+    assert display(gui, tours()) == (6, ["v4"], 4)
+    assert gui.threads == {threading.current_thread()}
+    assert gui.drawn[-1] == "6"
+
+
+def test_display_error():
+    """What the solver raises is raised by display."""
+    def tours():
+        yield 1, [], 0
+        raise ValueError("solver failed")
+
+    with pytest.raises(ValueError):
+        display(RecordingGui(), tours())
+
+
+class ClosedGui(RecordingGui):
+    """Gui whose window is closed once the solver started."""
+
+    def __init__(self, started):
+        super().__init__()
+        self.started = started
+
+    def handle_events(self):
+        self.started.wait(5)
+        sys.exit(0)
+
+
+def test_display_closed():
+    """Closing the window while solving stops the solver's processes."""
+    started = threading.Event()
+    children = []
+
+    def tours():
+        # an island, not a daemon, that would outlive the window
+        child = multiprocessing.Process(target=time.sleep, args=(60,))
+        child.start()
+        children.append(child)
+        started.set()
+        yield 1, [], 0
+        time.sleep(60)
+
+    with pytest.raises(SystemExit):
+        display(ClosedGui(started), tours())
+    children[0].join(5)
+    assert not children[0].is_alive()
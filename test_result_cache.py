@@ -0,0 +1,69 @@
+"""Result cache unit tests."""
+import time
+from math import isclose
+
+import numpy as np
+
+import MPoyPerez
+from instance import Instance
+from result_cache import ResultCache, canonical, instance_key, ordered_key
+from solution import Solution
+
+
+def test_canonical():
+    """Rotations and reversals of a tour are the same tour."""
+    assert canonical([2, 0, 3, 1]).tolist() == [0, 2, 1, 3]
+    assert canonical([1, 3, 0, 2]).tolist() == [0, 2, 1, 3]
+
+
+def test_warm_start(tmp_path):
+    """A repeat solve returns the cached tour when it is good enough."""
+    cache = ResultCache(str(tmp_path))
+    length, path = MPoyPerez.ga_solve(
+        'data/pb020.txt', False, maxstagnation=5, result_cache=cache
+    )
+    instance = Instance.from_file('data/pb020.txt')
+    assert len(cache.load(instance)) == 1
+
+    started = time.time()
+    again, again_path = MPoyPerez.ga_solve(
+        'data/pb020.txt', False, 60, result_cache=cache, good_enough=length
+    )
+    assert time.time() - started < 5
+    assert isclose(again, length) and sorted(again_path) == sorted(path)
+
+
+def test_eviction(tmp_path):
+    """The least recently used instances go first, the best tours stay."""
+    instances = [
+        Instance.from_arrays(None, np.random.RandomState(n).rand(50, 2))
+        for n in range(3)
+    ]
+    entry = 50 * 4 + 128
+    cache = ResultCache(str(tmp_path), max_bytes=2 * entry, tours=2)
+    for instance in instances:
+        cache.store(instance, [
+            Solution(instance, np.random.RandomState(i).permutation(50))
+            for i in range(4)
+        ])
+    tours = cache.load(instances[2])
+    assert len(tours) == 2 and len(cache.load(instances[0])) == 0
+    lengths = instances[2].tour_lengths(tours)
+    assert lengths[0] <= lengths[1]
+
+
+def test_any_city_order(tmp_path):
+    """The same cities in another order share their cached tours."""
+    coords = np.random.RandomState(7).rand(30, 2)
+    instance = Instance.from_arrays(None, coords)
+    shuffle = np.random.RandomState(8).permutation(30)
+    shuffled = Instance.from_arrays(None, coords[shuffle])
+    assert instance_key(instance) == instance_key(shuffled)
+    assert ordered_key(instance) != ordered_key(shuffled)
+
+    cache = ResultCache(str(tmp_path))
+    solution = Solution(instance, np.random.RandomState(9).permutation(30))
+    cache.store(instance, [solution])
+    [tour] = cache.load(shuffled)
+    assert isclose(float(shuffled.tour_lengths(tour)), solution.fitness)
+    assert sorted(tour.tolist()) == list(range(30))
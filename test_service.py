@@ -0,0 +1,114 @@
+"""Solver service tests, on localhost."""
+import asyncio
+from collections import OrderedDict
+import json
+import os
+from math import isclose
+import random
+
+from service import SolverService, warm_instance
+
+
+async def call(address, method, target, payload=None):
+    """Status and JSON lines of the response to a request."""
+    reader, writer = await asyncio.open_connection(*address)
+    return await answer(reader, writer, method, target, payload)
+
+
+async def answer(reader, writer, method, target, payload=None):
+    body = json.dumps(payload).encode() if payload is not None else b''
+    writer.write(
+        "{} {} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {}\r\n\r\n"
+        .format(method, target, len(body)).encode() + body
+    )
+    status = int((await reader.readline()).split()[1])
+    while (await reader.readline()) not in (b'\r\n', b''):
+        pass
+    lines = [json.loads(line) async for line in reader]
+    writer.close()
+    return status, lines
+
+
+def cities(n=30):
+    random.seed(n)
+    return [[random.uniform(0, 500), random.uniform(0, 500)] for i in range(n)]
+
+
+def test_solve():
+    """A tour of the coordinates sent, and errors for bad requests."""
+    async def scenario():
+        service = SolverService(processes=1)
+        await service.start()
+        try:
+            status, [result] = await call(service.address, 'POST', '/solve', {
+                'coords': cities(), 'maxtime': 0.5,
+                'options': {'population_size': 12},
+            })
+            assert status == 200 and result['event'] == 'done'
+            assert sorted(result['path'], key=int) == [
+                str(i) for i in range(30)
+            ]
+            status, [error] = await call(
+                service.address, 'POST', '/solve', {'coords': [[0, 0]]}
+            )
+            assert status == 400 and 'coords' in error['error']
+            status, [error] = await call(
+                service.address, 'POST', '/solve',
+                {'coords': cities(), 'maxtime': [1]}
+            )
+            assert status == 400 and 'malformed' in error['error']
+        finally:
+            await service.close()
+
+    asyncio.run(scenario())
+
+
+def test_stream_backpressure_cancel():
+    """Improvements are streamed, a full queue refuses jobs, jobs cancel."""
+    async def scenario():
+        service = SolverService(processes=1, queue_size=1)
+        await service.start()
+        address = service.address
+        try:
+            job = {'coords': cities(), 'maxtime': 60, 'stream': True}
+            reader, writer = await asyncio.open_connection(*address)
+            streamed = asyncio.ensure_future(
+                answer(reader, writer, 'POST', '/solve', job)
+            )
+            while not service.jobs or not service.jobs['1'].worker:
+                await asyncio.sleep(0.05)
+            queued = asyncio.ensure_future(call(address, 'POST', '/solve', job))
+            while service.queue.qsize() < 1:
+                await asyncio.sleep(0.05)
+
+            status, [refused] = await call(address, 'POST', '/solve', job)
+            assert status == 503
+            status, [state] = await call(address, 'GET', '/status')
+            assert state == {'workers': 1, 'running': 1, 'queued': 1}
+
+            await call(address, 'DELETE', '/jobs/2')
+            await call(address, 'DELETE', '/jobs/1')
+            status, lines = await asyncio.wait_for(streamed, 10)
+            assert status == 200 and lines[0]['event'] == 'best'
+            assert lines[-1]['event'] == 'done' and lines[-1]['cancelled']
+            assert lines[-1]['fitness'] <= lines[0]['fitness'] or isclose(
+                lines[-1]['fitness'], lines[0]['fitness']
+            )
+            status, [result] = await asyncio.wait_for(queued, 10)
+            assert result['event'] == 'cancelled'
+        finally:
+            await service.close()
+
+    asyncio.run(scenario())
+
+
+def test_warm_file_changed(tmp_path):
+    """A file changed since it was solved is loaded again."""
+    file = tmp_path / "cities.txt"
+    file.write_text("a 0 0\nb 1 0\nc 0 1\n")
+    instances = OrderedDict()
+    first = warm_instance(instances, {'file': str(file)})
+    assert warm_instance(instances, {'file': str(file)}) is first
+    file.write_text("a 0 0\nb 2 0\nc 0 2\nd 2 2\n")
+    os.utime(str(file), ns=(0, os.stat(str(file)).st_mtime_ns + 1))
+    assert len(warm_instance(instances, {'file': str(file)})) == 4
@@ -0,0 +1,50 @@
+"""Solution unit tests."""
+import random
+
+import numpy as np
+
+from solution import Solution, MUTATIONS, evaluate, order_crossover
+
+
+def test_mutations_update_fitness(random_instance):
+    """Delta fitness of the mutation operators equals a full evaluation."""
+    random.seed(1)
+    for size in (2, 3, 12):
+        instance = random_instance(size)
+        solution = Solution(instance, range(size))
+        for mutation in MUTATIONS * 200:
+            mutation(solution)
+            fitness = solution.fitness
+            solution.compute_fitness()
+            assert abs(fitness - solution.fitness) < 1e-6
+            assert sorted(solution.order.tolist()) == list(range(size))
+
+
+def test_evaluate(random_instance):
+    """Batch evaluation gives the same fitness as one by one."""
+    random.seed(2)
+    instance = random_instance()
+    orders = [random.sample(range(12), 12) for i in range(5)]
+    solutions = [Solution(instance, order, evaluate=False) for order in orders]
+    evaluate(solutions)
+    for solution in solutions:
+        expected = Solution(instance, solution.order).fitness
+        assert abs(solution.fitness - expected) < 1e-9
+
+
+def test_crossing(random_instance):
+    """Children of a solution with itself are the same tour."""
+    random.seed(6)
+    instance = random_instance(30)
+    father = Solution(instance, random.sample(range(30), 30))
+    for child in father.crossing(father):
+        assert child.successors.tolist() == father.successors.tolist()
+
+
+def test_order_crossover():
+    """OX on index arrays, same example as test_crossover."""
+    x = np.arange(8)
+    y = np.array([1, 4, 5, 7, 0, 3, 6, 2])
+    new_x, new_y = order_crossover(x, y, 2, 5)
+    assert new_x.tolist() == [3, 4, 5, 7, 0, 6, 1, 2]
+    assert new_y.tolist() == [7, 0, 2, 3, 4, 6, 1, 5]
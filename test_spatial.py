@@ -0,0 +1,48 @@
+"""Spatial index unit tests."""
+import random
+
+from spatial import KDTree, nearest_neighbour_tour, neighbour_lists
+
+
+def test_tree_nearest():
+    """The tree finds the same closest point as a linear scan."""
+    random.seed(3)
+    coords = [(random.randint(0, 500), random.randint(0, 500))
+              for i in range(200)]
+    tree = KDTree(coords)
+    remaining = set(range(len(coords)))
+    for index in range(len(coords) - 1):
+        tree.remove(index)
+        remaining.discard(index)
+        x, y = coords[index]
+        closest = tree.nearest(index)
+        expected = min(
+            (coords[other][0] - x) ** 2 + (coords[other][1] - y) ** 2
+            for other in remaining
+        )
+        assert (
+            (coords[closest][0] - x) ** 2 + (coords[closest][1] - y) ** 2
+        ) == expected
+
+
+def test_nearest_neighbour_tour():
+    """The tour always goes on to the closest city left."""
+    coords = [(0, 0), (10, 0), (1, 0), (4, 0), (20, 0), (4, 0)]
+    tour = nearest_neighbour_tour(coords)
+    assert tour[:2] == [0, 2] and sorted(tour[2:4]) == [3, 5]
+    assert tour[4:] == [1, 4]
+
+
+def test_neighbour_lists():
+    """Neighbour lists hold the k closest other cities, closest first."""
+    random.seed(4)
+    coords = [(random.random(), random.random()) for i in range(100)]
+    neighbours = neighbour_lists(coords, 5)
+    assert neighbours.shape == (100, 5)
+    for index, (x, y) in enumerate(coords):
+        expected = sorted(
+            (other for other in range(100) if other != index),
+            key=lambda other: (coords[other][0] - x) ** 2
+            + (coords[other][1] - y) ** 2
+        )[:5]
+        assert neighbours[index].tolist() == expected
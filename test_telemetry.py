@@ -0,0 +1,60 @@
+"""Convergence telemetry unit tests."""
+import json
+import socket
+import threading
+
+import MPoyPerez
+from telemetry import Telemetry
+
+
+def test_telemetry_file(tmp_path):
+    """One record per generation, then the final one."""
+    file = tmp_path / "run.jsonl"
+    telemetry = Telemetry(str(file), every='generation')
+    length, path = MPoyPerez.ga_solve(
+        'data/pb020.txt', False, maxstagnation=5, telemetry=telemetry
+    )
+    telemetry.close()
+    records = [json.loads(line) for line in file.read_text().splitlines()]
+    assert [record['generation'] for record in records[:-1]] == list(
+        range(1, len(records))
+    )
+    assert records[-1]['final'] and records[-1]['best'] == length
+    for record in records[:-1]:
+        assert record['best'] <= record['mean'] <= record['worst']
+    # the run stops after 5 generations without improvement
+    assert records[-2]['stagnation'] == 5
+
+
+def test_telemetry_final_length(tmp_path):
+    """The final record holds the length returned, summed from scratch."""
+    for seed in range(5):
+        file = tmp_path / "run{}.jsonl".format(seed)
+        length, path = MPoyPerez.ga_solve(
+            'data/pb050.txt', False, maxstagnation=30, local_search=False,
+            seed=seed, telemetry=str(file)
+        )
+        final = json.loads(file.read_text().splitlines()[-1])
+        assert final['final'] and final['best'] == length
+
+
+def test_telemetry_socket():
+    """Records on improvement sent to a TCP socket."""
+    server = socket.create_server(('127.0.0.1', 0))
+    received = []
+
+    def receive():
+        connection, address = server.accept()
+        with connection, connection.makefile() as lines:
+            received.extend(json.loads(line) for line in lines)
+
+    thread = threading.Thread(target=receive)
+    thread.start()
+    length, path = MPoyPerez.ga_solve(
+        'data/pb020.txt', False, maxstagnation=5,
+        telemetry='tcp://127.0.0.1:{}'.format(server.getsockname()[1])
+    )
+    thread.join(5)
+    server.close()
+    assert received and received[-1]['final']
+    assert all(record['stagnation'] == 0 for record in received[:-1])
@@ -0,0 +1,72 @@
+"""Tester validation unit tests."""
+import importlib
+import queue
+import shutil
+
+import tester
+import tsplib
+
+
+def test_tsplib_optimal_tours(tmp_path):
+    """The published optimal tours have their length with the tester's
+    own TSPLIB distances."""
+    burma14 = [1, 2, 14, 3, 4, 5, 6, 12, 7, 13, 8, 11, 9, 10]
+    cities, distance, best = tester.load('data/burma14.tsp')
+    path = [str(number) for number in burma14]
+    assert best == 3323
+    assert tester.validate(cities, 3323, path, distance) == (True, None)
+    assert not tester.validate(cities, 3322, path, distance)[0]
+
+    # without a known optimum, the .opt.tour file is measured
+    for name in ('berlin52.tsp', 'berlin52.opt.tour'):
+        shutil.copy('data/' + name, str(tmp_path / name.replace('52', '')))
+    cities, distance, best = tester.load(str(tmp_path / 'berlin.tsp'))
+    assert best == tsplib.OPTIMA['berlin52']
+
+
+def test_explicit(tmp_path):
+    """Each EDGE_WEIGHT_FORMAT gives the same symmetric matrix."""
+    matrix = [[0, 3, 4, 5], [3, 0, 5, 4], [4, 5, 0, 3], [5, 4, 3, 0]]
+    layouts = {
+        'FULL_MATRIX': [w for row in matrix for w in row],
+        'UPPER_ROW': [3, 4, 5, 5, 4, 3],
+        'LOWER_DIAG_ROW': [0, 3, 0, 4, 5, 0, 5, 4, 3, 0],
+        'UPPER_COL': [3, 4, 5, 5, 4, 3],
+    }
+    for layout, weights in layouts.items():
+        file = tmp_path / "tiny.tsp"
+        file.write_text(
+            "NAME: tiny\nDIMENSION: 4\nEDGE_WEIGHT_TYPE: EXPLICIT\n"
+            "EDGE_WEIGHT_FORMAT: {}\nEDGE_WEIGHT_SECTION\n{}\nEOF\n".format(
+                layout, " ".join(map(str, weights))
+            )
+        )
+        cities, distance = tester.read_tsplib(str(file))
+        assert [
+            [distance(a, b) for b in cities] for a in cities
+        ] == matrix, layout
+        assert tester.validate(cities, 14, ['1', '2', '4', '3'], distance)[0]
+
+
+def test_worker_instance(tmp_path, monkeypatch):
+    """The tasks of a worker on the same file share one loaded Instance."""
+    (tmp_path / "fake_solver.py").write_text(
+        "instances = []\n\n\n"
+        "def ga_solve(file, gui, maxtime, seed=None, instance=None):\n"
+        "    instances.append(instance)\n"
+        "    order = instance.nearest_neighbour_tour()\n"
+        "    return float(instance.tour_lengths(order)), "
+        "instance.path(order)\n"
+    )
+    monkeypatch.syspath_prepend(str(tmp_path))
+    tasks = queue.Queue()
+    for number in range(3):
+        tasks.put((number, 'fake_solver', 'data/pb010.txt', 1, number))
+    tasks.put(None)
+    results = queue.Queue()
+    tester.work(None, tasks, results)
+    for number in range(3):
+        assert results.get_nowait()[:2] == (number, True)
+    instances = importlib.import_module('fake_solver').instances
+    assert len(instances) == 3 and instances[0] is not None
+    assert all(instance is instances[0] for instance in instances)
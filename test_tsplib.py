@@ -0,0 +1,41 @@
+"""TSPLIB reader unit tests."""
+import numpy as np
+import pytest
+
+import tsplib
+from instance import Instance
+
+
+def test_berlin52_optimum():
+    """The optimal tour of berlin52 has the published length."""
+    instance = Instance.from_file("data/berlin52.tsp")
+    tour = tsplib.load_tour("data/berlin52.opt.tour")
+    assert instance.metric == 'EUC_2D' and len(instance) == 52
+    assert sorted(tour.tolist()) == list(range(52))
+    assert instance.tour_lengths(tour) == tsplib.OPTIMA['berlin52']
+    assert tsplib.gap(7919.1, 7542) == pytest.approx(5)
+
+
+def test_rounding():
+    """Each edge weight type rounds the distances its own way."""
+    coords = np.array([[0., 0.], [1., 1.], [10., 0.]])
+    assert tsplib.distance_matrix(coords, 'EUC_2D')[0].tolist() == [0, 1, 10]
+    assert tsplib.distance_matrix(coords, 'CEIL_2D')[0].tolist() == [0, 2, 10]
+    assert tsplib.distance_matrix(coords, 'ATT')[0].tolist() == [0, 1, 4]
+
+
+def test_explicit(tmp_path):
+    """An explicit lower triangle gives a symmetric matrix."""
+    file = tmp_path / "tiny.tsp"
+    file.write_text(
+        "NAME: tiny\nTYPE: TSP\nDIMENSION: 4\nEDGE_WEIGHT_TYPE: EXPLICIT\n"
+        "EDGE_WEIGHT_FORMAT: LOWER_DIAG_ROW\nEDGE_WEIGHT_SECTION\n"
+        "0\n3 0\n4 5 0\n5 4 3 0\nEOF\n"
+    )
+    instance = Instance.from_file(str(file))
+    assert instance.dist.tolist() == [
+        [0, 3, 4, 5], [3, 0, 5, 4], [4, 5, 0, 3], [5, 4, 3, 0]
+    ]
+    assert instance.coords.shape == (4, 2)
+    assert instance.neighbours[0].tolist() == [1, 2, 3]
+    assert instance.nearest_neighbour_tour() == [0, 1, 3, 2]
@@ -12,13 +12,20 @@ v0.5, Yoan Blanc, doSimple
 """
 
 import csv
+import inspect
+import math
 import multiprocessing
 import os
+import queue
 import sys
+import time
 from importlib import import_module
 from itertools import cycle
 from math import hypot, isclose
 
+import tsplib
+from instance import Instance
+
 # PARAMETRES
 # =========
 # modifier cette partie pour l'adapter à vos besoins
@@ -42,11 +49,23 @@ tests = (
     ('data/pb050.txt', 30),
     ('data/pb050.txt', 60),
     ('data/pb100.txt', 20),
-    ('data/pb100.txt', 90), )
+    ('data/pb100.txt', 90),
+    # problèmes TSPLIB, dont l'écart à l'optimum publié est rapporté
+    ('data/burma14.tsp', 5),
+    ('data/berlin52.tsp', 30), )
 
 # On tolère un dépassement de 5% du temps imparti:
 tolerance = 0.05
 
+# Graines des exécutions répétées de chaque test, passées aux solveurs par
+# leur paramètre seed; None les laisse choisir. Avec plusieurs graines, la
+# grille rapporte la longueur moyenne.
+seeds = (None, )
+
+# Nombre de processus exécutant les tests en parallèle, chacun attaché à
+# son propre processeur lorsque c'est possible
+processes = 1
+
 # Fichier dans lequel écrire les résultats
 outfile = sys.stdout
 # ou :
@@ -70,13 +89,120 @@ def dist(city1, city2):
     return hypot(x2 - x1, y2 - y1)
 
 
-def validate(cities, length, path):
-    """Validation de la solution."""
+# Rayon de la Terre et valeur de pi de la spécification TSPLIB (GEO)
+RRR = 6378.388
+PI = 3.141592
+
+# Cases de la matrice données, ligne par ligne, par chaque format d'une
+# EDGE_WEIGHT_SECTION. Une colonne du triangle supérieur est une ligne du
+# triangle inférieur, et inversement, les matrices étant symétriques.
+ROWS = {
+    'FULL_MATRIX': lambda i, n: range(n),
+    'UPPER_ROW': lambda i, n: range(i + 1, n),
+    'LOWER_ROW': lambda i, n: range(i),
+    'UPPER_DIAG_ROW': lambda i, n: range(i, n),
+    'LOWER_DIAG_ROW': lambda i, n: range(i + 1),
+}
+ROWS['UPPER_COL'] = ROWS['LOWER_ROW']
+ROWS['LOWER_COL'] = ROWS['UPPER_ROW']
+ROWS['UPPER_DIAG_COL'] = ROWS['LOWER_DIAG_ROW']
+ROWS['LOWER_DIAG_COL'] = ROWS['UPPER_DIAG_ROW']
+
+
+def nint(x):
+    """Entier le plus proche, comme la spécification TSPLIB l'arrondit."""
+    return int(x + 0.5)
+
+
+def geo(x):
+    """Coordonnée DDD.MM (degrés et minutes) en radians."""
+    deg = int(x)
+    return PI * (deg + 5.0 * (x - deg) / 3.0) / 180.0
+
+
+def weight(kind, city1, city2):
+    """Poids TSPLIB de l'arête entre deux villes selon EDGE_WEIGHT_TYPE."""
+    (x1, y1), (x2, y2) = city1, city2
+    if kind == 'GEO':
+        if city1 == city2:
+            return 0
+        q1 = math.cos(geo(y1) - geo(y2))
+        q2 = math.cos(geo(x1) - geo(x2))
+        q3 = math.cos(geo(x1) + geo(x2))
+        return int(RRR * math.acos(0.5 * ((1 + q1) * q2 - (1 - q1) * q3)) + 1)
+    if kind == 'ATT':
+        r = math.sqrt(((x1 - x2) ** 2 + (y1 - y2) ** 2) / 10.0)
+        t = nint(r)
+        return t + 1 if t < r else t
+    if kind == 'CEIL_2D':
+        return math.ceil(dist(city1, city2))
+    if kind == 'EUC_2D':
+        return nint(dist(city1, city2))
+    raise ValueError("EDGE_WEIGHT_TYPE %s inconnu" % kind)
+
+
+def read_tsplib(filename):
+    """
+    Villes d'un problème TSPLIB et distance entre deux d'entre elles,
+    lues et calculées ici selon la spécification TSPLIB, sans rien
+    demander au solveur. Les villes sont nommées par leur numéro.
+    """
+    header = {}
+    nodes = {}
+    weights = []
+    section = None
+    with open(filename) as f:
+        for line in f:
+            line = line.strip()
+            if not line or line == 'EOF':
+                continue
+            keyword = line.split(':')[0].strip()
+            if keyword[0].isalpha():
+                section = keyword if keyword.endswith('_SECTION') else None
+                if section is None and ':' in line:
+                    header[keyword] = line.split(':', 1)[1].strip()
+            elif section in ('NODE_COORD_SECTION', 'DISPLAY_DATA_SECTION'):
+                number, x, y = line.split()
+                name = str(int(number))
+                # les coordonnées ont priorité sur celles d'affichage
+                if section == 'NODE_COORD_SECTION' or name not in nodes:
+                    nodes[name] = (float(x), float(y))
+            elif section == 'EDGE_WEIGHT_SECTION':
+                weights += [float(w) for w in line.split()]
+
+    n = int(header['DIMENSION'])
+    names = [str(number) for number in range(1, n + 1)]
+    cities = {name: nodes.get(name) for name in names}
+    kind = header.get('EDGE_WEIGHT_TYPE', 'EUC_2D')
+    if kind != 'EXPLICIT':
+        return cities, lambda a, b: weight(kind, cities[a], cities[b])
+
+    # matrice complète à partir de la section des poids
+    rows = ROWS[header.get('EDGE_WEIGHT_FORMAT', 'FULL_MATRIX')]
+    matrix = [[0.0] * n for i in range(n)]
+    w = iter(weights)
+    for i in range(n):
+        for j in rows(i, n):
+            matrix[i][j] = next(w)
+            if rows is not ROWS['FULL_MATRIX']:
+                matrix[j][i] = matrix[i][j]
+    index = {name: i for i, name in enumerate(names)}
+    return cities, lambda a, b: matrix[index[a]][index[b]]
+
+
+def validate(cities, length, path, distance=None):
+    """
+    Validation de la solution. La longueur est mesurée avec distance, une
+    fonction de deux noms de villes, celle d'un problème TSPLIB par
+    exemple; par défaut la distance euclidienne entre leurs coordonnées.
+    """
+    if distance is None:
+        def distance(a, b):
+            return dist(cities[a], cities[b])
     try:
         c = cycle(path)
         next(c)
-        totaldist = sum(
-            dist(cities[src], cities[dst]) for src, dst in zip(path, c))
+        totaldist = sum(distance(src, dst) for src, dst in zip(path, c))
 
         if not isclose(totaldist, length):
             return False, "Wrong dist! (%.3f instead of %.3f)" % (length,
@@ -94,6 +220,159 @@ def validate(cities, length, path):
     return True, None
 
 
+def load(filename):
+    """
+    Villes d'un problème pour la validation, la distance mesurant ses
+    tours s'il a ses propres distances (TSPLIB) et son optimum s'il est
+    connu. Le tour optimal d'un fichier .opt.tour est mesuré ici aussi.
+    """
+    if not filename.endswith('.tsp'):
+        # the solvers' runs on the same file reuse its binary cache
+        instance = Instance.from_file(filename)
+        cities = dict(zip(instance.names.tolist(), instance.coords.tolist()))
+        return cities, None, None
+    cities, distance = read_tsplib(filename)
+    best = tsplib.optimum(filename)
+    tour_file = os.path.splitext(filename)[0] + '.opt.tour'
+    if best is None and os.path.exists(tour_file):
+        tour = [str(i + 1) for i in tsplib.load_tour(tour_file).tolist()]
+        best = sum(distance(a, b) for a, b in zip(tour, tour[1:] + tour[:1]))
+    return cities, distance, best
+
+
+def work(cpu, tasks, results):
+    """
+    Processus de test, attaché au processeur cpu. Exécute les tâches
+    (numéro, module, fichier, temps, graine) reçues par tasks et met
+    (numéro, succès, longueur ou message, optimum) dans results. Les
+    solveurs et les problèmes déjà chargés servent aux tâches suivantes:
+    les solveurs ayant un paramètre instance reçoivent l'Instance du
+    fichier, chargée une seule fois par le processus.
+    """
+    if cpu is not None:
+        os.sched_setaffinity(0, {cpu})
+    solvers = {}
+    instances = {}
+    problems = {}
+    for number, m, filename, maxtime, seed in iter(tasks.get, None):
+        try:
+            if m not in solvers:
+                solvers[m] = import_module(m).ga_solve
+            options = {} if seed is None else {'seed': seed}
+            if 'instance' in inspect.signature(solvers[m]).parameters:
+                if filename not in instances:
+                    instances[filename] = Instance.from_file(filename)
+                options['instance'] = instances[filename]
+            length, path = solvers[m](filename, gui, maxtime, **options)
+        except Exception as e:
+            results.put((number, False, e.__class__.__name__, None))
+            continue
+
+        if filename not in problems:
+            problems[filename] = load(filename)
+        cities, distance, best = problems[filename]
+        success, message = validate(cities, length, path, distance)
+        results.put((number, success, length if success else message, best))
+
+
+class Worker:
+    """Processus de test et la tâche qu'il exécute."""
+
+    def __init__(self, index, results):
+        cpu = None
+        if hasattr(os, 'sched_getaffinity'):
+            cpus = sorted(os.sched_getaffinity(0))
+            cpu = cpus[index % len(cpus)]
+        self.tasks = multiprocessing.SimpleQueue()
+        # pas un démon, les solveurs peuvent lancer leurs propres processus
+        self.process = multiprocessing.Process(
+            target=work, args=(cpu, self.tasks, results)
+        )
+        self.process.start()
+        self.task = None
+        self.deadline = None
+        # dernier problème résolu, déjà chargé par le processus
+        self.filename = None
+
+    def send(self, task):
+        number, m, filename, maxtime, seed = task
+        self.task = task
+        self.filename = filename
+        self.deadline = time.time() + maxtime * (1 + tolerance)
+        self.tasks.put(task)
+
+    def stop(self):
+        self.tasks.put(None)
+        self.process.join()
+
+    def kill(self):
+        self.process.terminate()
+        self.process.join()
+
+
+def cell(outcomes):
+    """Case de la grille résumant les résultats d'un test pour un module."""
+    for success, value, best in outcomes:
+        if not success:
+            return value
+    length = sum(value for success, value, best in outcomes) / len(outcomes)
+    if best:
+        return "{} ({:.2f}%)".format(int(length), tsplib.gap(length, best))
+    return int(length)
+
+
+def run(tasks):
+    """
+    Exécute les tâches sur processes processus et génère les résultats
+    (numéro, succès, longueur ou message, optimum) dans l'ordre où ils
+    arrivent. Une tâche dépassant son temps est interrompue avec son
+    processus, qui est remplacé.
+    """
+    results = multiprocessing.Queue()
+    workers = [Worker(index, results) for index in range(processes)]
+    pending = list(tasks)
+    try:
+        while pending or any(worker.task for worker in workers):
+            for worker in workers:
+                if worker.task or not pending:
+                    continue
+                # de préférence un test du problème que le processus connaît
+                task = next(
+                    (task for task in pending if task[2] == worker.filename),
+                    pending[0]
+                )
+                pending.remove(task)
+                if verbose:
+                    print("--> %s: %s, %d, seed %s" % task[1:], file=sys.stderr)
+                worker.send(task)
+
+            busy = [worker for worker in workers if worker.task]
+            timeout = min(worker.deadline for worker in busy) - time.time()
+            try:
+                number, success, value, best = results.get(
+                    timeout=max(timeout, 0)
+                )
+            except queue.Empty:
+                pass
+            else:
+                for worker in busy:
+                    if worker.task[0] == number:
+                        worker.task = None
+                        yield number, success, value, best
+
+            for index, worker in enumerate(workers):
+                if worker.task and time.time() > worker.deadline:
+                    yield worker.task[0], False, 'TimeoutError', None
+                    worker.kill()
+                    workers[index] = Worker(index, results)
+    finally:
+        for worker in workers:
+            if worker.task:
+                worker.kill()
+            else:
+                worker.stop()
+
+
 def main():
     """
     Programme principal.
@@ -127,49 +406,42 @@ def main():
     # Cette partie effectue les tests proprement dits
     # et rapporte les résultats dans outfile
 
-    with multiprocessing.Pool(processes=1) as pool:
-        for filename, maxtime in tests:
-            # Écriture de l'en-tête de ligne
+    # Toute la grille est planifiée d'avance, problème par problème, pour
+    # que les processus gardent le même problème chargé
+    tasks = []
+    for test, (filename, maxtime) in enumerate(tests):
+        # normalisation du nom de fichier (pour l'aspect multi-plateforme)
+        filename = os.path.normcase(os.path.normpath(filename))
+        for seed in seeds:
+            for m in solvers:
+                tasks.append((len(tasks), m, filename, maxtime, seed))
+    # résultats de chaque test par module
+    outcomes = [{m: [] for m in solvers} for test in tests]
+    per_test = len(seeds) * len(solvers)
+
+    written = 0
+
+    def write_rows():
+        """Écriture des lignes complètes, dans l'ordre des tests."""
+        nonlocal written
+        while written < len(tests) and all(
+            len(outcomes[written][m]) == len(seeds) for m in solvers
+        ):
+            filename, maxtime = tests[written]
             row = ["{0} ({1}s)".format(filename, maxtime)]
-
-            with open(filename, newline='') as f:
-                reader = csv.reader(f, delimiter=' ')
-                cities = {name: (int(x), int(y)) for name, x, y in reader}
-
-            if verbose:
-                print("--> %s, %d" % (filename, maxtime), file=sys.stderr)
-
-            # normalisation du nom de fichier (pour l'aspect multi-plateforme)
-            filename = os.path.normcase(os.path.normpath(filename))
-
-            # Appel des solveurs proprement dits, vérification et écriture des
-            # résultats
             for m in modules:
-                if verbose:
-                    print("## %s" % m, file=sys.stderr)
-
-                if m not in solvers:
-                    row.append(-1)
-                    continue
-
-                try:
-                    result = pool.apply_async(solvers[m],
-                                              (filename, gui, maxtime))
-                    try:
-                        length, path = result.get(maxtime * (1 + tolerance))
-                    except KeyboardInterrupt:
-                        print("The pool is closing...", file=sys.stderr)
-                        pool.terminate()
-                        pool.join()
-                except Exception as e:
-                    row.append(e.__class__.__name__)
-                else:
-                    success, message = validate(cities, length, path)
-                    if success:
-                        row.append(int(length))
-                    else:
-                        row.append(message)
+                row.append(cell(outcomes[written][m]) if m in solvers else -1)
             out.writerow(row)
+            written += 1
+
+    try:
+        for number, success, value, best in run(tasks):
+            m = tasks[number][1]
+            outcomes[number // per_test][m].append((success, value, best))
+            write_rows()
+        write_rows()
+    except KeyboardInterrupt:
+        print("The workers are stopping...", file=sys.stderr)
 
     if isinstance(outfile, str):
         outf.close()
@@ -0,0 +1,223 @@
+"""
+Reader of the TSPLIB files: .tsp problems and .opt.tour optimal tours.
+
+Supported edge weight types are EUC_2D, CEIL_2D, ATT, GEO and EXPLICIT,
+with the distances rounded to integers as the TSPLIB defines them, so the
+lengths found can be compared to the published optima.
+"""
+import os
+
+import numpy as np
+
+# published optimal tour lengths, by problem name
+OPTIMA = {
+    'a280': 2579,
+    'att48': 10628,
+    'bays29': 2020,
+    'berlin52': 7542,
+    'burma14': 3323,
+    'ch130': 6110,
+    'ch150': 6528,
+    'd198': 15780,
+    'eil51': 426,
+    'eil76': 538,
+    'gr17': 2085,
+    'kroA100': 21282,
+    'kroC100': 20749,
+    'lin105': 14379,
+    'pcb442': 50778,
+    'pr2392': 378032,
+    'rat99': 1211,
+    'st70': 675,
+    'ulysses22': 7013,
+}
+
+# TSPLIB Earth radius and pi, in km, for the GEO distances
+EARTH_RADIUS = 6378.388
+PI = 3.141592
+
+# upper and lower column layouts are the lower and upper row ones
+EXPLICIT_FORMATS = {
+    'UPPER_COL': 'LOWER_ROW',
+    'LOWER_COL': 'UPPER_ROW',
+    'UPPER_DIAG_COL': 'LOWER_DIAG_ROW',
+    'LOWER_DIAG_COL': 'UPPER_DIAG_ROW',
+}
+
+SECTIONS = (
+    'NODE_COORD_SECTION', 'EDGE_WEIGHT_SECTION', 'DISPLAY_DATA_SECTION',
+    'TOUR_SECTION',
+)
+
+
+def read_sections(file):
+    """
+    Header of a TSPLIB file as a dict, and the numbers of every data
+    section as a list of strings by section name.
+    """
+    header = {}
+    sections = {}
+    numbers = None
+    with open(file) as tsplib_file:
+        for line in tsplib_file:
+            line = line.strip()
+            if not line:
+                continue
+            keyword = line.split(':')[0].strip()
+            if keyword == 'EOF':
+                break
+            if keyword in SECTIONS:
+                numbers = sections.setdefault(keyword, [])
+            elif numbers is not None and not keyword[0].isalpha():
+                numbers += line.split()
+            elif ':' in line:
+                numbers = None
+                header[keyword] = line.split(':', 1)[1].strip()
+            else:
+                # a section this reader does not know, skip its data
+                numbers = []
+    return header, sections
+
+
+def load_tsp(file):
+    """
+    Read a TSPLIB .tsp file. Returns the node numbers as a NumPy array of
+    strings, the (n, 2) coordinates, the matrix of the distances and the
+    edge weight type.
+
+    EXPLICIT problems without display data get coordinates spreading the
+    cities as their distances do, only good for drawing them.
+    """
+    header, sections = read_sections(file)
+    n = int(header['DIMENSION'])
+    metric = header.get('EDGE_WEIGHT_TYPE', 'EUC_2D')
+    if metric not in ('EUC_2D', 'CEIL_2D', 'ATT', 'GEO', 'EXPLICIT'):
+        raise ValueError("unsupported edge weight type {}".format(metric))
+
+    coords = None
+    nodes = sections.get('NODE_COORD_SECTION') or sections.get(
+        'DISPLAY_DATA_SECTION'
+    )
+    if nodes:
+        if len(nodes) != 3 * n:
+            raise ValueError(
+                "expected {} nodes \"number x y\", got {} fields".format(
+                    n, len(nodes)
+                )
+            )
+        table = np.array(nodes, dtype=np.float64).reshape(n, 3)
+        coords = np.empty((n, 2))
+        coords[table[:, 0].astype(np.intp) - 1] = table[:, 1:]
+
+    if metric == 'EXPLICIT':
+        dist = explicit_matrix(
+            sections.get('EDGE_WEIGHT_SECTION', []), n,
+            header.get('EDGE_WEIGHT_FORMAT', 'FULL_MATRIX')
+        )
+        if coords is None:
+            coords = embed(dist)
+    elif coords is None:
+        raise ValueError("no NODE_COORD_SECTION in {}".format(file))
+    else:
+        dist = distance_matrix(coords, metric)
+
+    names = np.array([str(number) for number in range(1, n + 1)])
+    return names, coords, dist, metric
+
+
+def load_tour(file):
+    """
+    Read a TSPLIB .opt.tour file. Returns the tour as an array of indices,
+    node number 1 being index 0.
+    """
+    header, sections = read_sections(file)
+    numbers = [int(number) for number in sections.get('TOUR_SECTION', [])]
+    if -1 in numbers:
+        numbers = numbers[:numbers.index(-1)]
+    return np.array(numbers, dtype=np.int32) - 1
+
+
+def distance_matrix(coords, metric):
+    """Distances between every pair of the (n, 2) coords array."""
+    if metric == 'GEO':
+        # DDD.MM degrees and minutes to radians
+        degrees = np.trunc(coords)
+        radians = PI * (degrees + 5. * (coords - degrees) / 3.) / 180.
+        latitude, longitude = radians[:, 0], radians[:, 1]
+        q1 = np.cos(longitude[:, np.newaxis] - longitude[np.newaxis, :])
+        q2 = np.cos(latitude[:, np.newaxis] - latitude[np.newaxis, :])
+        q3 = np.cos(latitude[:, np.newaxis] + latitude[np.newaxis, :])
+        cosine = np.clip(0.5 * ((1. + q1) * q2 - (1. - q1) * q3), -1., 1.)
+        dist = np.trunc(EARTH_RADIUS * np.arccos(cosine) + 1.)
+        np.fill_diagonal(dist, 0.)
+        return dist
+
+    delta = coords[:, np.newaxis, :] - coords[np.newaxis, :, :]
+    squares = np.einsum('ijk,ijk->ij', delta, delta)
+    if metric == 'ATT':
+        pseudo = np.sqrt(squares / 10.)
+        rounded = np.floor(pseudo + 0.5)
+        return np.where(rounded < pseudo, rounded + 1., rounded)
+    if metric == 'CEIL_2D':
+        return np.ceil(np.sqrt(squares))
+    return np.floor(np.sqrt(squares) + 0.5)
+
+
+def explicit_matrix(weights, n, layout):
+    """Full matrix of the weights of an EDGE_WEIGHT_SECTION."""
+    layout = EXPLICIT_FORMATS.get(layout, layout)
+    weights = np.array(weights, dtype=np.float64)
+    if layout == 'FULL_MATRIX':
+        return weights[:n * n].reshape(n, n)
+
+    dist = np.zeros((n, n))
+    if layout == 'UPPER_ROW':
+        rows, columns = np.triu_indices(n, 1)
+    elif layout == 'LOWER_ROW':
+        rows, columns = np.tril_indices(n, -1)
+    elif layout == 'UPPER_DIAG_ROW':
+        rows, columns = np.triu_indices(n)
+    elif layout == 'LOWER_DIAG_ROW':
+        rows, columns = np.tril_indices(n)
+    else:
+        raise ValueError("unsupported edge weight format {}".format(layout))
+    if len(weights) < len(rows):
+        raise ValueError(
+            "expected {} edge weights, got {}".format(len(rows), len(weights))
+        )
+    dist[rows, columns] = weights[:len(rows)]
+    dist[columns, rows] = weights[:len(rows)]
+    return dist
+
+
+def embed(dist):
+    """
+    (n, 2) coordinates whose Euclidean distances are close to dist, by
+    classical multidimensional scaling.
+    """
+    n = len(dist)
+    centering = np.eye(n) - 1. / n
+    gram = -0.5 * centering @ (dist ** 2) @ centering
+    values, vectors = np.linalg.eigh(gram)
+    # eigenvalues come in ascending order, keep the two largest
+    return vectors[:, -2:][:, ::-1] * np.sqrt(np.maximum(values[-2:][::-1], 0))
+
+
+def optimum(file, instance=None):
+    """
+    Optimal tour length of a TSPLIB problem, from OPTIMA or the .opt.tour
+    file next to it, measured on instance. None when it is not known.
+    """
+    stem = os.path.splitext(file)[0]
+    name = os.path.basename(stem)
+    if name in OPTIMA:
+        return OPTIMA[name]
+    tour_file = stem + '.opt.tour'
+    if instance is not None and os.path.exists(tour_file):
+        return float(instance.tour_lengths(load_tour(tour_file)))
+    return None
+
+
+def gap(length, best):
+    """Relative gap, in percent, of a tour length to the optimum best."""
+    return 100. * (length - best) / best